@@ -0,0 +1,225 @@
+import datetime
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+import zlib
+
+# zstd compresses feeds better and decompresses faster, zlib keeps the archive usable without it
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+SEGMENT_BYTES = 256 * 1024 * 1024
+
+
+def compress(content: bytes) -> tuple:
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=9).compress(content)
+    return 'zlib', zlib.compress(content, 6)
+
+
+def decompress(codec: str, data) -> bytes:
+    if codec == 'zlib':
+        return zlib.decompress(data)
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ValueError('zstandard is needed to read this archive')
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f'Unknown codec {codec}')
+
+
+class PayloadArchive:
+    def __init__(self, directory: str = 'archive', segment_bytes: int = SEGMENT_BYTES) -> None:
+        # Payloads are appended compressed to segment files, once per content hash; the index maps every run's
+        # fetches to them
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.lock = threading.Lock()
+        self.run_at = None
+        self.stored = 0
+        self.reused = 0
+        os.makedirs(directory, exist_ok=True)
+
+        self.connection = sqlite3.connect(os.path.join(directory, 'index.sqlite'), check_same_thread=False)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS payloads (
+                digest TEXT PRIMARY KEY,
+                segment INTEGER,
+                offset INTEGER,
+                length INTEGER,
+                size INTEGER,
+                codec TEXT
+            )
+        """)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS fetches (
+                run_at TEXT,
+                url TEXT,
+                digest TEXT,
+                PRIMARY KEY (run_at, url)
+            )
+        """)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS boards (
+                run_at TEXT,
+                feed TEXT,
+                company TEXT,
+                platform TEXT,
+                source_type TEXT,
+                PRIMARY KEY (run_at, feed)
+            )
+        """)
+        self.connection.commit()
+
+        self.segment = self.connection.execute('SELECT COALESCE(MAX(segment), 0) FROM payloads').fetchone()[0]
+        self.writer = None
+        self.maps = {}
+
+    def segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f'segment-{segment:06d}.bin')
+
+    def begin(self, run_at: str) -> None:
+        self.run_at = run_at
+
+    def add_board(self, feed: str, company: str, platform: str, source_type: str) -> None:
+        with self.lock:
+            self.connection.execute('INSERT OR REPLACE INTO boards VALUES (?, ?, ?, ?, ?)',
+                                    (self.run_at, feed, company, platform, source_type))
+            self.connection.commit()
+
+    def put(self, url: str, content: bytes) -> None:
+        digest = hashlib.sha256(content).hexdigest()
+        with self.lock:
+            known = self.connection.execute('SELECT 1 FROM payloads WHERE digest = ?', (digest,)).fetchone()
+            if known is None:
+                self.append(digest, content)
+                self.stored += 1
+            else:
+                self.reused += 1
+            self.connection.execute('INSERT OR REPLACE INTO fetches VALUES (?, ?, ?)', (self.run_at, url, digest))
+            self.connection.commit()
+
+    def touch(self, url: str) -> None:
+        # A 304 means the payloads of the last fetch are the payloads of this run as well. The board's further
+        # pages are not requested on a 304, so they are carried over with the feed for the run to replay
+        pages = f'{url}?page='
+        with self.lock:
+            self.connection.execute("""
+                INSERT OR REPLACE INTO fetches
+                SELECT ?, url, digest FROM fetches
+                WHERE run_at = (SELECT MAX(run_at) FROM fetches WHERE url = ? AND run_at < ?)
+                AND (url = ? OR substr(url, 1, ?) = ?)
+            """, (self.run_at, url, self.run_at, url, len(pages), pages))
+            self.connection.commit()
+
+    def append(self, digest: str, content: bytes) -> None:
+        codec, data = compress(content)
+        if self.writer is None:
+            self.segment = max(self.segment, 1)
+            self.writer = open(self.segment_path(self.segment), 'ab')
+        if self.writer.tell() > 0 and self.writer.tell() + len(data) > self.segment_bytes:
+            self.writer.close()
+            self.segment += 1
+            self.writer = open(self.segment_path(self.segment), 'ab')
+
+        # The payload is on disk before the index points at it
+        offset = self.writer.tell()
+        self.writer.write(data)
+        self.writer.flush()
+        self.connection.execute('INSERT INTO payloads VALUES (?, ?, ?, ?, ?, ?)',
+                                (digest, self.segment, offset, len(data), len(content), codec))
+
+    def read(self, digest: str) -> bytes:
+        with self.lock:
+            row = self.connection.execute('SELECT segment, offset, length, codec FROM payloads WHERE digest = ?',
+                                          (digest,)).fetchone()
+            if row is None:
+                raise ValueError(f'Payload {digest} is not archived')
+            segment, offset, length, codec = row
+            mapped = self.maps.get(segment)
+            # A segment that grew since it was mapped is mapped again
+            if mapped is None or offset + length > len(mapped):
+                with open(self.segment_path(segment), 'rb') as file:
+                    mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                self.maps[segment] = mapped
+        # Decompressed straight from the mapped pages, the compressed bytes are never copied
+        return decompress(codec, memoryview(mapped)[offset:offset + length])
+
+    def fetched(self, run_at: str, url: str) -> bytes:
+        with self.lock:
+            row = self.connection.execute('SELECT digest FROM fetches WHERE run_at = ? AND url = ?',
+                                          (run_at, url)).fetchone()
+        if row is None:
+            raise ValueError(f'{url} is not archived for run {run_at}')
+        return self.read(row[0])
+
+    def runs(self, since: str = None, until: str = None) -> list:
+        # run_at is an ISO timestamp, so a date prefix like 2024-05 selects by string comparison
+        query = 'SELECT DISTINCT run_at FROM boards WHERE run_at >= ?'
+        parameters = [since or '']
+        if until is not None:
+            query += ' AND run_at < ?'
+            parameters.append(until)
+        with self.lock:
+            return [run_at for run_at, in self.connection.execute(query + ' ORDER BY run_at', parameters)]
+
+    def boards(self, run_at: str) -> list:
+        # (feed, company, platform, source_type) of every board whose feed was archived in the run
+        with self.lock:
+            return self.connection.execute("""
+                SELECT boards.feed, boards.company, boards.platform, boards.source_type FROM boards
+                JOIN fetches ON fetches.run_at = boards.run_at AND fetches.url = boards.feed
+                WHERE boards.run_at = ? ORDER BY boards.feed
+            """, (run_at,)).fetchall()
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+        for mapped in self.maps.values():
+            mapped.close()
+        self.connection.close()
+
+
+class ArchivedResponse:
+    # Stands in for a requests.Response, with what the fetchers and paginating extractors read of one
+    def __init__(self, url: str, content: bytes) -> None:
+        self.url = url
+        self.content = content
+        self.status_code = 200
+        self.headers = {}
+        self.elapsed = datetime.timedelta(0)
+        self.bytes_received = len(content)
+
+
+class ArchivingSession:
+    def __init__(self, session, archive: PayloadArchive) -> None:
+        # Every page a fetcher or extractor requests goes into the archive, so pagination replays as well
+        self.session = session
+        self.archive = archive
+
+    def get(self, url: str, headers: dict = None, **kwargs):
+        response = self.session.get(url, headers=headers, **kwargs)
+        if response.status_code == 200:
+            self.archive.put(url, response.content)
+        elif response.status_code == 304:
+            self.archive.touch(url)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+
+class ReplaySession:
+    def __init__(self, archive: PayloadArchive, run_at: str) -> None:
+        # Answers every request with the payload the archived run received, nothing goes to the network
+        self.archive = archive
+        self.run_at = run_at
+
+    def get(self, url: str, headers: dict = None, **kwargs) -> ArchivedResponse:
+        return ArchivedResponse(url, self.archive.fetched(self.run_at, url))
+
+    def close(self) -> None:
+        pass
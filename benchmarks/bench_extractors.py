@@ -0,0 +1,183 @@
+import argparse
+import gc
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fetcher import DataFetcher
+from extractor import Extractor
+from metrics import Metrics
+from payloads import PLATFORMS, page_payload
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+# The Personio extractor builds job links from the feed's subdomain, so it needs a real looking feed URL
+EXTRACTION_URLS = {
+    'Personio': 'https://acme.jobs.personio.de/xml'
+}
+
+# Only parsing and extraction are timed, network and server noise would swamp them
+STAGES = ['parse', 'extract']
+
+
+class PayloadResponse:
+    def __init__(self, content: bytes) -> None:
+        self.status_code = 200
+        self.content = content
+
+
+class PayloadSession:
+    # Answers the paginated extractors from payloads built up front, ?page=N as the stand-in server does
+    def __init__(self, platform: str, scale: int) -> None:
+        self.platform = platform
+        self.scale = scale
+        self.pages = {}
+
+    def page(self, page: int) -> bytes:
+        if page not in self.pages:
+            self.pages[page] = page_payload(self.platform, page, self.scale)
+        return self.pages[page]
+
+    def get(self, url: str, headers: dict = None, **kwargs) -> PayloadResponse:
+        return PayloadResponse(self.page(int(parse_qs(urlparse(url).query).get('page', ['1'])[0])))
+
+
+def run_board(platform: str, session: PayloadSession, metrics: Metrics) -> int:
+    source_type = PLATFORMS[platform][0]
+    url = EXTRACTION_URLS.get(platform, f'https://{platform.lower()}.example/jobs')
+    data_fetcher = DataFetcher.create([url], source_type, 'Acme', platform, session)
+
+    data_fetcher.timed_parse(session.page(1))
+    metrics.add_time('Acme', platform, 'parse', data_fetcher.timings['parse'])
+
+    jobs = 0
+    data_extractor = Extractor.create(data_fetcher)
+    for _ in metrics.timed_iter(data_extractor.iter_jobs(), 'Acme', platform, 'extract'):
+        jobs += 1
+
+    # Pages read ahead past the last one finish on their own threads, they count for this board and must not
+    # run into the next measurement
+    for thread in threading.enumerate():
+        if thread is not threading.current_thread():
+            thread.join()
+    return jobs
+
+
+def peak_memory(platform: str, session: PayloadSession) -> float:
+    # A separate pass, tracemalloc slows allocation down too much to time the same run
+    gc.collect()
+    tracemalloc.start()
+    run_board(platform, session, Metrics())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def run(platforms: list, scale: int, repeat: int, min_time: float, measure_memory: bool) -> dict:
+    # A first untimed run builds every page
+    sessions = {platform: PayloadSession(platform, scale) for platform in platforms}
+    for platform in platforms:
+        run_board(platform, sessions[platform], Metrics())
+
+    # The platforms take turns for repeat rounds, so every platform's runs are spread over the whole benchmark
+    # and a slow stretch of the machine does not hit one of them only. Within a round a fast board runs until
+    # its share of min_time is spent. Throughput is the best run in CPU time of the process
+    best = {}
+    for _ in range(repeat):
+        for platform in platforms:
+            runs, spent = 0, 0.0
+            while runs == 0 or spent < min_time / repeat:
+                metrics = Metrics()
+                gc.collect()
+                start = time.process_time()
+                jobs = run_board(platform, sessions[platform], metrics)
+                seconds = time.process_time() - start
+                runs, spent = runs + 1, spent + seconds
+                if platform not in best or seconds < best[platform][1]:
+                    best[platform] = (jobs, seconds, metrics.board('Acme', platform).stages)
+
+    results = {}
+    for platform in platforms:
+        jobs, seconds, stages = best[platform]
+        results[platform] = {
+            'jobs': jobs,
+            'seconds': seconds,
+            'jobs_per_sec': jobs / seconds if seconds else 0,
+            'stages': stages,
+            'peak_mb': peak_memory(platform, sessions[platform]) if measure_memory else None
+        }
+
+    return results
+
+
+def compare(results: dict, baselines: dict, tolerance: float) -> list:
+    # A regression is throughput below or peak memory above the baseline by more than the tolerance
+    regressions = []
+    for platform, result in results.items():
+        baseline = baselines.get(platform)
+        if baseline is None:
+            continue
+        if result['jobs_per_sec'] < baseline['jobs_per_sec'] * (1 - tolerance):
+            regressions.append(f"{platform}: {result['jobs_per_sec']:.0f} jobs/s, baseline {baseline['jobs_per_sec']:.0f}")
+        # Compared unrounded, the printed values only show two decimals
+        if result['peak_mb'] is not None and baseline.get('peak_mb') is not None \
+                and result['peak_mb'] > baseline['peak_mb'] * (1 + tolerance):
+            regressions.append(f"{platform}: {result['peak_mb']:.2f} MB peak, baseline {baseline['peak_mb']:.2f}")
+    return regressions
+
+
+def print_results(results: dict) -> None:
+    print(f"{'platform':<17}{'jobs':>8}{'jobs/s':>11}{'peak MB':>9}" + ''.join(f'{stage:>10}' for stage in STAGES))
+    for platform, result in results.items():
+        peak = f"{result['peak_mb']:>9.2f}" if result['peak_mb'] is not None else f"{'-':>9}"
+        print(f"{platform:<17}{result['jobs']:>8}{result['jobs_per_sec']:>11.0f}{peak}"
+              + ''.join(f"{result['stages'].get(stage, 0) * 1000:>8.1f}ms" for stage in STAGES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark parsing and extraction of every extractor on recorded payloads')
+    parser.add_argument('--platform', nargs='*', default=list(PLATFORMS), choices=list(PLATFORMS))
+    parser.add_argument('--scale', type=int, default=100,
+                        help='repeat the postings of every payload, 3334 gives 100k postings for the API feeds')
+    parser.add_argument('--repeat', type=int, default=5, help='rounds over every platform, the best run counts')
+    parser.add_argument('--min-time', type=float, default=1.0, help='least seconds of timed runs per platform over all rounds')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc pass')
+    parser.add_argument('--check', action='store_true', help='exit with 1 when a platform regressed')
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = run(args.platform, args.scale, args.repeat, args.min_time, not args.no_memory)
+    print_results(results)
+
+    baselines = {}
+    if os.path.exists(BASELINES):
+        with open(BASELINES) as file:
+            baselines = json.load(file)
+
+    # Baselines are stored per scale, throughput only compares at the same payload size
+    if args.save_baseline:
+        baselines.setdefault(str(args.scale), {}).update(
+            {platform: {'jobs_per_sec': result['jobs_per_sec'], 'peak_mb': result['peak_mb']}
+             for platform, result in results.items()})
+        with open(BASELINES, 'w') as file:
+            json.dump(baselines, file, indent=4, sort_keys=True)
+        print(f'Baseline for scale {args.scale} saved to {BASELINES}')
+
+    if args.check:
+        regressions = compare(results, baselines.get(str(args.scale), {}), args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION: {regression}')
+        if regressions:
+            sys.exit(1)
+        print('No regressions against the stored baseline')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parsers
+from payloads import FIXTURES, scale_payload
+
+
+def bench(parse, content: bytes, backend: str, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        parse(content, backend)
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare parser backends on the recorded fixtures')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--scale', type=int, default=1, help='repeat the postings in every fixture')
+    args = parser.parse_args()
+
+    kinds = {
+        '.html': (parsers.parse_html, parsers.HTML_BACKENDS),
+        '.xml': (parsers.parse_xml, parsers.XML_BACKENDS),
+        '.json': (parsers.parse_json, parsers.JSON_BACKENDS)
+    }
+
+    print(f"{'fixture':<22}{'backend':<14}{'size KB':>10}{'ms/parse':>12}{'MB/s':>10}{'speedup':>10}")
+    for name in sorted(os.listdir(FIXTURES)):
+        extension = os.path.splitext(name)[1]
+        if extension not in kinds:
+            continue
+
+        parse, backends = kinds[extension]
+        with open(os.path.join(FIXTURES, name), 'rb') as file:
+            content = scale_payload(name, file.read(), args.scale)
+
+        # The standard library backend is last in every list and is the baseline
+        baseline = None
+        for backend in reversed(backends):
+            if not parsers.available(backend):
+                print(f"{name:<22}{backend:<14}{'not installed':>42}")
+                continue
+            seconds = bench(parse, content, backend, args.iterations)
+            baseline = baseline or seconds
+            print(f"{name:<22}{backend:<14}{len(content) / 1024:>10.1f}{seconds * 1000:>12.2f}"
+                  f"{len(content) / seconds / 1e6:>10.1f}{baseline / seconds:>9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+import json
+import os
+import re
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Platform name as in JobBoards.xlsx, source type and the recorded payload for every extractor
+PLATFORMS = {
+    'Greenhouse': ('json', 'greenhouse.json'),
+    'Personio': ('xml', 'personio.xml'),
+    'Ashby': ('json', 'ashby.json'),
+    'Recruitee': ('json', 'recruitee.json'),
+    'Lever': ('json', 'lever.json'),
+    'SmartRecruiters': ('json', 'smartrecruiters.json'),
+    'Polymer': ('json', 'polymer.json'),
+    'Join': ('html', 'join.html'),
+    'Teamtailor': ('html', 'teamtailor.html'),
+    'Dover': ('json', 'dover.json')
+}
+
+# Teamtailor pages served before the show more button disappears
+TEAMTAILOR_PAGES = 4
+
+
+def load_fixture(name: str) -> bytes:
+    with open(os.path.join(FIXTURES, name), 'rb') as file:
+        return file.read()
+
+
+def scale_payload(name: str, content: bytes, scale: int) -> bytes:
+    # Repeat the postings inside the recorded payload to get large feeds with a realistic shape
+    if scale == 1:
+        return content
+
+    if name.endswith('.json'):
+        data = json.loads(content)
+        if isinstance(data, list):
+            return json.dumps(data * scale).encode('utf-8')
+        key = next(key for key, value in data.items() if isinstance(value, list))
+        data[key] = data[key] * scale
+        return json.dumps(data).encode('utf-8')
+
+    if name.endswith('.xml'):
+        text = content.decode('utf-8')
+        positions = ''.join(re.findall(r'<position>.*?</position>\s*', text, re.S))
+        return text.replace(positions, positions * scale).encode('utf-8')
+
+    # HTML: repeat the job list markup of Join tiles and Teamtailor list items
+    text = content.decode('utf-8')
+    match = re.search(r'(<div class="sc-hLseeU JobTile.*</a></div>)|(<li class="w-full">.*</li>)', text, re.S)
+    if match is None:
+        return content
+    return text.replace(match.group(0), match.group(0) * scale).encode('utf-8')
+
+
+def page_payload(platform: str, page: int, scale: int = 1) -> bytes:
+    # Paginated boards get distinct job ids per page, and Teamtailor drops the show more button on the last page
+    name = PLATFORMS[platform][1]
+    # Teamtailor pages past the last one have no postings, like on the real board
+    if platform == 'Teamtailor' and page > TEAMTAILOR_PAGES:
+        scale = 0
+    content = scale_payload(name, load_fixture(name), scale)
+
+    if platform == 'Join':
+        content = content.replace(b'companies/acme/1000', f'companies/acme/{page:02d}00'.encode())
+    elif platform == 'Teamtailor':
+        content = content.replace(b'jobs/45', f'jobs/{page:02d}'.encode())
+        if page >= TEAMTAILOR_PAGES:
+            content = content.replace(b'id="show_more_button"', b'id="end_of_list"')
+
+    return content
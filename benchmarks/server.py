@@ -0,0 +1,73 @@
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from payloads import PLATFORMS, page_payload
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    # Serves the recorded payloads as /<platform>/<scale>?page=N, standing in for the real job boards
+    latency = 0.0
+    cache = {}
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        parts = url.path.strip('/').split('/')
+        platform = parts[0]
+        scale = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 1
+        page = int(query.get('page', ['1'])[0])
+
+        if platform not in PLATFORMS:
+            self.send_error(404)
+            return
+
+        key = (platform, page, scale)
+        if key not in self.cache:
+            self.cache[key] = page_payload(platform, page, scale)
+        body = self.cache[key]
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        content_type = {'json': 'application/json', 'xml': 'application/xml', 'html': 'text/html'}[PLATFORMS[platform][0]]
+        self.send_response(200)
+        self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    def __init__(self, port: int = 0, latency: float = 0.0) -> None:
+        handler = type('Handler', (FixtureHandler,), {'latency': latency, 'cache': {}})
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server.server_address[1]}'
+
+    def __enter__(self) -> 'FixtureServer':
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve the recorded job board payloads locally')
+    parser.add_argument('--port', type=int, default=8700)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds to wait before every response')
+    args = parser.parse_args()
+
+    with FixtureServer(args.port, args.latency) as fixture_server:
+        print(f'Serving {", ".join(PLATFORMS)} on {fixture_server.url}/<platform>/<scale>')
+        fixture_server.thread.join()
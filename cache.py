@@ -0,0 +1,99 @@
+import sqlite3
+import threading
+import time
+
+
+class CacheEntry:
+    def __init__(self, url: str, etag: str, last_modified: str, body: bytes) -> None:
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.body = body
+
+    def conditional_headers(self) -> dict:
+        headers = {}
+        if self.etag is not None:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified is not None:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    def __init__(self, path: str = 'responses.sqlite', max_bytes: int = 512 * 1024 * 1024, bypass: bool = False) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        # With bypass the cache is not read, but fresh responses are still written for the next run
+        self.bypass = bypass
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.stored = 0
+
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body BLOB,
+                size INTEGER,
+                accessed_at REAL
+            )
+        """)
+        # Caches of earlier versions also kept the parsed feed, which a 304 never needs
+        if 'data' in {column[1] for column in self.connection.execute('PRAGMA table_info(responses)')}:
+            self.connection.execute('ALTER TABLE responses DROP COLUMN data')
+            self.connection.execute('UPDATE responses SET size = length(body)')
+        self.connection.commit()
+
+    def get(self, url: str) -> CacheEntry:
+        if self.bypass:
+            return None
+
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT etag, last_modified, body FROM responses WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            return None
+
+        return CacheEntry(url, *row)
+
+    def touch(self, url: str) -> None:
+        with self.lock:
+            self.hits += 1
+            self.connection.execute('UPDATE responses SET accessed_at = ? WHERE url = ?', (time.time(), url))
+            self.connection.commit()
+
+    def put(self, url: str, etag: str, last_modified: str, body: bytes) -> None:
+        # Without a validator the server can never answer 304, so there is nothing to gain
+        if etag is None and last_modified is None:
+            return
+
+        with self.lock:
+            self.stored += 1
+            self.connection.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+                (url, etag, last_modified, body, len(body), time.time()))
+            self.evict()
+            self.connection.commit()
+
+    def evict(self) -> None:
+        # Drop the least recently used responses until the cache fits into max_bytes
+        total = self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self.connection.execute('SELECT url, size FROM responses ORDER BY accessed_at').fetchall()
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            self.connection.execute('DELETE FROM responses WHERE url = ?', (url,))
+            total -= size
+
+    def clear(self) -> None:
+        with self.lock:
+            self.connection.execute('DELETE FROM responses')
+            self.connection.commit()
+
+    def close(self) -> None:
+        self.connection.close()
@@ -0,0 +1,105 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import time
+
+
+class BoardFile:
+    def __init__(self, path: str) -> None:
+        # Rows go to a temporary file that only takes its real name once the board is complete
+        self.path = path
+        self.temporary_path = f'{path}.{os.getpid()}.tmp'
+        self.file = gzip.open(self.temporary_path, 'wt', encoding='utf-8')
+        self.rows = 0
+
+    def write(self, rows: list) -> None:
+        self.file.writelines(json.dumps(row, default=str) + '\n' for row in rows)
+        self.rows += len(rows)
+
+    def commit(self) -> str:
+        self.file.close()
+        with open(self.temporary_path, 'rb') as file:
+            os.fsync(file.fileno())
+        os.replace(self.temporary_path, self.path)
+        return self.path
+
+    def abort(self) -> None:
+        self.file.close()
+        if os.path.exists(self.temporary_path):
+            os.remove(self.temporary_path)
+
+
+class RunJournal:
+    def __init__(self, connection, directory: str = 'runs', run_id: str = None, resume: bool = False) -> None:
+        # The journal shares the state store's connection, so a board's state changes and its journal entry
+        # are committed in the same transaction
+        self.connection = connection
+        self.directory = directory
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                started_at REAL,
+                completed_at REAL
+            )
+        """)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS run_boards (
+                run_id TEXT,
+                feed TEXT,
+                company TEXT,
+                path TEXT,
+                rows INTEGER,
+                finished_at REAL,
+                PRIMARY KEY (run_id, feed)
+            )
+        """)
+
+        unfinished = self.connection.execute(
+            'SELECT run_id FROM runs WHERE completed_at IS NULL ORDER BY started_at DESC LIMIT 1').fetchone()
+        # The state of the unfinished run's boards is committed already, a new run would lose their delta rows
+        if unfinished is not None and not resume:
+            raise ValueError(f'Run {unfinished[0]} is unfinished, continue it with --resume')
+        if unfinished is not None:
+            self.run_id = unfinished[0]
+            self.resumed = True
+        else:
+            self.run_id = run_id or time.strftime('%Y%m%dT%H%M%S')
+            self.resumed = False
+            self.connection.execute('INSERT OR IGNORE INTO runs VALUES (?, ?, NULL)', (self.run_id, time.time()))
+        self.connection.commit()
+
+        self.run_directory = os.path.join(directory, self.run_id)
+        os.makedirs(self.run_directory, exist_ok=True)
+
+    def completed(self) -> set:
+        return {feed for feed, in self.connection.execute('SELECT feed FROM run_boards WHERE run_id = ?', (self.run_id,))}
+
+    def open_board(self, feed: str) -> BoardFile:
+        name = hashlib.sha1(feed.encode('utf-8')).hexdigest()[:16]
+        return BoardFile(os.path.join(self.run_directory, f'{name}.jsonl.gz'))
+
+    def record(self, feed: str, company: str, board_file: BoardFile = None) -> None:
+        # Not committed here, the caller commits it together with the board's state
+        path = board_file.commit() if board_file is not None else None
+        rows = board_file.rows if board_file is not None else 0
+        self.connection.execute('INSERT OR REPLACE INTO run_boards VALUES (?, ?, ?, ?, ?, ?)',
+                                (self.run_id, feed, company, path, rows, time.time()))
+
+    def iter_rows(self):
+        # Rows of every completed board in the order the boards finished, nothing is extracted again
+        boards = self.connection.execute("""
+            SELECT path FROM run_boards WHERE run_id = ? AND path IS NOT NULL ORDER BY finished_at
+        """, (self.run_id,)).fetchall()
+        for path, in boards:
+            with gzip.open(path, 'rt', encoding='utf-8') as file:
+                for line in file:
+                    yield json.loads(line)
+
+    def finish(self) -> None:
+        # The merged output is written, the board files are not needed anymore
+        self.connection.execute('UPDATE runs SET completed_at = ? WHERE run_id = ?', (time.time(), self.run_id))
+        self.connection.execute('DELETE FROM run_boards WHERE run_id = ?', (self.run_id,))
+        self.connection.commit()
+        shutil.rmtree(self.run_directory, ignore_errors=True)
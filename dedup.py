@@ -0,0 +1,214 @@
+import html
+import re
+import zlib
+from array import array
+
+from normalize import normalize_key
+
+MERSENNE_PRIME = (1 << 61) - 1
+TAG = re.compile(r'<[^>]+>')
+WORD = re.compile(r'\w+')
+
+
+def shingles(text: str, size: int = 3) -> set:
+    # Word n-grams of the description without markup, hashed to 32 bits with crc32; escaped markup is unescaped
+    # first so it is stripped as well
+    words = WORD.findall(TAG.sub(' ', html.unescape(text)).casefold())
+    if len(words) < size:
+        return {zlib.crc32(' '.join(words).encode('utf-8'))} if words else set()
+    return {zlib.crc32(' '.join(words[index:index + size]).encode('utf-8')) for index in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 64, a: int = 0x5DEECE66D, b: int = 0xB) -> None:
+        # One universal hash (a * x + b) mod p split into num_perm bins, so a signature costs one pass
+        # over the shingles instead of one pass per permutation
+        self.num_perm = num_perm
+        self.a = a
+        self.b = b
+
+    def signature(self, hashes: set) -> array:
+        num_perm, a, b = self.num_perm, self.a, self.b
+        empty = MERSENNE_PRIME
+        signature = [empty] * num_perm
+        for value in hashes:
+            value = (a * value + b) % MERSENNE_PRIME
+            slot, rank = value % num_perm, value // num_perm
+            if rank < signature[slot]:
+                signature[slot] = rank
+
+        # Empty bins borrow the next filled bin so short descriptions still compare on every position
+        filled = list(signature)
+        if empty in filled and len(set(filled)) > 1:
+            for slot in range(num_perm):
+                offset = 0
+                while filled[(slot + offset) % num_perm] == empty:
+                    offset += 1
+                signature[slot] = filled[(slot + offset) % num_perm] + offset
+        return array('Q', signature)
+
+
+def similarity(first: array, second: array) -> float:
+    return sum(1 for left, right in zip(first, second) if left == right) / len(first)
+
+
+def title_words(title) -> frozenset:
+    # Single letters are gender markers like (m/w/d) that one board adds and the other leaves out
+    return frozenset(word for word in WORD.findall(normalize_key(title or '')) if len(word) > 1)
+
+
+def jaccard(first: frozenset, second: frozenset) -> float:
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+class DedupIndex:
+    def __init__(self, num_perm: int = 64, bands: int = 8, threshold: float = 0.8, min_shingles: int = 10,
+                 title_threshold: float = 0.8) -> None:
+        if num_perm % bands:
+            raise ValueError('num_perm must be a multiple of bands')
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        # 8 bands of 8 rows put the LSH threshold near 0.77, candidates are then checked against threshold
+        self.threshold = threshold
+        self.min_shingles = min_shingles
+        # Boards reuse one boilerplate text for all their postings, so a similar description alone is not enough
+        self.title_threshold = title_threshold
+
+        self.exact = {}
+        self.exact_keys = {}
+        self.buckets = {}
+        self.signatures = {}
+        self.postings = {}
+        self.parent = {}
+        # Keys of every group in the order they were added, the first one is the group's root
+        self.members = {}
+        # Duplicates by key, one of them is exported when the first posting of its group is removed
+        self.held_back = {}
+        self.duplicates = 0
+
+    def find(self, key: tuple) -> tuple:
+        root = key
+        while self.parent[root] != root:
+            root = self.parent[root]
+        # Path compression keeps later lookups flat
+        while self.parent[key] != root:
+            self.parent[key], key = root, self.parent[key]
+        return root
+
+    def union(self, key: tuple, other: tuple) -> tuple:
+        # The posting seen first stays the representative of its group
+        root, other_root = self.find(key), self.find(other)
+        if root != other_root:
+            self.parent[other_root] = root
+            self.members[root].extend(self.members.pop(other_root))
+        return root
+
+    def agrees(self, words: frozenset, location: str, candidate: tuple) -> bool:
+        # Mirrors keep the title up to small edits and the location, a board that leaves it out matches any
+        candidate_words, candidate_location = self.postings[candidate]
+        if location and candidate_location and location != candidate_location:
+            return False
+        return jaccard(words, candidate_words) >= self.title_threshold
+
+    def add(self, record) -> tuple:
+        # Returns the (company, id) of the posting this one duplicates, or None for a new posting
+        key = (record['company'], record['id'])
+        if key in self.parent:
+            root = self.find(key)
+            if root == key:
+                return None
+            self.held_back[key] = record
+            return root
+        self.parent[key] = key
+        self.members[key] = [key]
+
+        company = normalize_key(record['company'] or '')
+        match = None
+
+        location = normalize_key(record['location'] or '')
+        exact_key = (company, normalize_key(record['title'] or ''), location)
+        self.exact_keys[key] = exact_key
+        if exact_key in self.exact:
+            match = self.exact[exact_key]
+        else:
+            self.exact[exact_key] = key
+
+        description = record['description']
+        hashes = shingles(description) if isinstance(description, str) else set()
+        if len(hashes) >= self.min_shingles:
+            signature = self.hasher.signature(hashes)
+            # Buckets are per company, identical templates of different companies are not duplicates
+            candidates = set()
+            for band in range(self.bands):
+                bucket = (company, band, hash(signature[band * self.rows:(band + 1) * self.rows].tobytes()))
+                members = self.buckets.setdefault(bucket, [])
+                if match is None:
+                    candidates.update(members)
+                members.append(key)
+
+            words = title_words(record['title'])
+            if match is None:
+                for candidate in candidates:
+                    if self.agrees(words, location, candidate) \
+                            and similarity(signature, self.signatures[candidate]) >= self.threshold:
+                        match = candidate
+                        break
+            self.signatures[key] = signature
+            self.postings[key] = (words, location)
+
+        if match is None:
+            return None
+        self.duplicates += 1
+        self.held_back[key] = record
+        return self.union(match, key)
+
+    def exported(self, changes):
+        # A board's (change, posting) pairs without the duplicates. The state store yields a board's removals
+        # after its other changes, so a repost under a new id is held back first and takes over its group once
+        # the old id turns out to be removed
+        for change, record in changes:
+            if change != 'removed':
+                if self.add(record) is None:
+                    yield change, record
+                continue
+            yield change, record
+            successor = self.remove(record)
+            if successor is not None:
+                yield 'added', self.held_back.pop(successor)
+
+    def remove(self, record) -> tuple:
+        # A removed posting no longer groups anything. Returns the (company, id) of the posting that takes
+        # over a group the removed one was first of, so the caller can export it
+        key = (record['company'], record['id'])
+        if key not in self.parent:
+            return None
+        root = self.find(key)
+        members = [member for member in self.members.pop(root) if member != key]
+
+        exact_key = self.exact_keys.pop(key)
+        if self.exact.get(exact_key) == key:
+            successor = next((member for member in members if self.exact_keys[member] == exact_key), None)
+            if successor is None:
+                del self.exact[exact_key]
+            else:
+                self.exact[exact_key] = successor
+        signature = self.signatures.pop(key, None)
+        if signature is not None:
+            for band in range(self.bands):
+                bucket = (exact_key[0], band, hash(signature[band * self.rows:(band + 1) * self.rows].tobytes()))
+                self.buckets[bucket].remove(key)
+        self.postings.pop(key, None)
+        self.held_back.pop(key, None)
+        del self.parent[key]
+
+        if not members:
+            return None
+        # Flattened, so no member is left pointing at the removed key
+        new_root = members[0] if root == key else root
+        for member in members:
+            self.parent[member] = new_root
+        self.members[new_root] = members
+        return new_root if root == key else None
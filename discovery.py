@@ -0,0 +1,281 @@
+import argparse
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from fetcher import DataFetcher
+from extractor import Extractor
+from session import HttpSession
+
+# Cheaper sources first: a JSON or XML feed is one request, HTML boards are parsed and paginated
+SOURCE_COST = {'json': 0, 'xml': 1, 'html': 2}
+
+UUID = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+# Custom career domains of Teamtailor only give themselves away by their assets
+TEAMTAILOR_MARKERS = ('teamtailor-cdn', 'content="Teamtailor"')
+# Path segments the board patterns also match but that are never a board
+NOT_SLUGS = {'embed', 'api', 'www', 'app', 'jobs', 'careers', 'static', 'assets', 'cdn', 'v1', 'v0', 'en', 'de'}
+
+
+class Platform:
+    def __init__(self, name: str, source: str, feed: str, job_board: str, patterns: list) -> None:
+        # name as in the Platform column, feed and job_board are templates of the board's slug
+        self.name = name
+        self.source = source
+        self.feed = feed
+        self.job_board = job_board
+        self.patterns = [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+
+    def slugs(self, text: str) -> list:
+        slugs = []
+        for pattern in self.patterns:
+            for slug in pattern.findall(text):
+                if slug.casefold() not in NOT_SLUGS and slug not in slugs:
+                    slugs.append(slug)
+        return slugs
+
+
+PLATFORMS = [
+    Platform('Greenhouse', 'json', 'https://boards-api.greenhouse.io/v1/boards/{slug}/jobs',
+             'https://job-boards.greenhouse.io/{slug}',
+             [r'(?:job-)?boards(?:\.eu)?\.greenhouse\.io/(?:embed/job_board(?:/js)?\?for=)?([\w-]+)',
+              r'boards-api\.greenhouse\.io/v1/boards/([\w-]+)']),
+    Platform('Lever', 'json', 'https://api.lever.co/v0/postings/{slug}?mode=json', 'https://jobs.lever.co/{slug}',
+             [r'jobs(?:\.eu)?\.lever\.co/([\w.-]+)', r'api(?:\.eu)?\.lever\.co/v0/postings/([\w.-]+)']),
+    Platform('Ashby', 'json', 'https://api.ashbyhq.com/posting-api/job-board/{slug}', 'https://jobs.ashbyhq.com/{slug}',
+             [r'jobs\.ashbyhq\.com/([\w.-]+)', r'api\.ashbyhq\.com/posting-api/job-board/([\w.-]+)']),
+    Platform('Recruitee', 'json', 'https://{slug}.recruitee.com/api/offers/', 'https://{slug}.recruitee.com/',
+             [r'([a-z0-9-]+)\.recruitee\.com']),
+    Platform('Smartrecruiters', 'json', 'https://api.smartrecruiters.com/v1/companies/{slug}/postings',
+             'https://careers.smartrecruiters.com/{slug}',
+             [r'(?:careers|jobs)\.smartrecruiters\.com/([\w-]+)', r'api\.smartrecruiters\.com/v1/companies/([\w-]+)']),
+    Platform('Polymer', 'json', 'https://api.polymer.co/v1/hire/organizations/{slug}/jobs', 'https://jobs.polymer.co/{slug}',
+             [r'jobs\.polymer\.co/([\w-]+)']),
+    # The Dover API takes the careers page's id, a page found by its slug is resolved to it first
+    Platform('Dover', 'json', 'https://app.dover.com/api/v1/careers-page/{slug}/jobs?limit=300&offset=0',
+             'https://app.dover.com/jobs/{slug}',
+             [r'app\.dover\.com/api/v1/careers-page/([0-9a-f-]{36})', r'app\.dover\.com/(?:jobs|apply)/([\w-]+)']),
+    # The extractor reads the subdomain from a .de feed, .com boards answer there as well
+    Platform('Personio', 'xml', 'https://{slug}.jobs.personio.de/xml', 'https://{slug}.jobs.personio.de/',
+             [r'([a-z0-9-]+)\.jobs\.personio\.(?:de|com)']),
+    Platform('Join', 'html', 'https://join.com/companies/{slug}', 'https://join.com/companies/{slug}',
+             [r'join\.com/companies/([\w-]+)']),
+    Platform('Teamtailor', 'html', 'https://{slug}.teamtailor.com/jobs', 'https://{slug}.teamtailor.com/jobs',
+             [r'([a-z0-9-]+)\.teamtailor\.com'])
+]
+
+
+def careers_url(url: str) -> str:
+    url = url.strip()
+    return url if '://' in url else f'https://{url}'
+
+
+def slug_guesses(url: str, name: str = None) -> list:
+    # 'https://www.tacto.ai/careers' guesses 'tacto', a company name adds its own spellings
+    labels = [label for label in urlparse(url).netloc.lower().split('.') if label not in ('www', 'careers', 'jobs')]
+    guesses = [labels[-2]] if len(labels) >= 2 else []
+    if name:
+        words = re.findall(r'\w+', name.casefold())
+        guesses += [''.join(words), '-'.join(words)]
+    slugs = []
+    for guess in guesses:
+        for slug in (guess, guess.replace('-', '')):
+            if slug and slug not in slugs:
+                slugs.append(slug)
+    return slugs
+
+
+class Candidate:
+    def __init__(self, platform: Platform, slug: str, found: bool, feed: str = None, job_board: str = None) -> None:
+        # found is True for boards the careers page links to, guessed boards only count with postings
+        self.platform = platform
+        self.slug = slug
+        self.found = found
+        self.feed = feed or platform.feed.format(slug=slug)
+        self.job_board = job_board or platform.job_board.format(slug=slug)
+        self.postings = None
+
+    def rank(self) -> tuple:
+        return not self.found, SOURCE_COST[self.platform.source], -(self.postings or 0)
+
+    def as_dict(self) -> dict:
+        return {'platform': self.platform.name, 'source': self.platform.source, 'feed': self.feed,
+                'job_board': self.job_board, 'postings': self.postings}
+
+
+class DiscoveryCache:
+    def __init__(self, path: str = 'discovery.sqlite', miss_ttl: float = 7 * 24 * 60 * 60) -> None:
+        # Found boards are kept until refreshed, pages without a known board are probed again after miss_ttl
+        self.miss_ttl = miss_ttl
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS discoveries (
+                url TEXT PRIMARY KEY,
+                platform TEXT,
+                source TEXT,
+                feed TEXT,
+                job_board TEXT,
+                postings INTEGER,
+                discovered_at REAL
+            )
+        """)
+        self.connection.commit()
+
+    def get(self, url: str) -> tuple:
+        # (True, result) for a cached answer, result is None for a cached miss
+        with self.lock:
+            row = self.connection.execute("""
+                SELECT platform, source, feed, job_board, postings, discovered_at FROM discoveries WHERE url = ?
+            """, (url,)).fetchone()
+        if row is None or (row[0] is None and time.time() - row[5] > self.miss_ttl):
+            return False, None
+        with self.lock:
+            self.hits += 1
+        if row[0] is None:
+            return True, None
+        return True, dict(zip(['platform', 'source', 'feed', 'job_board', 'postings'], row))
+
+    def put(self, url: str, result: dict) -> None:
+        result = result or {}
+        with self.lock:
+            self.connection.execute('INSERT OR REPLACE INTO discoveries VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                    (url, result.get('platform'), result.get('source'), result.get('feed'),
+                                     result.get('job_board'), result.get('postings'), time.time()))
+            self.connection.commit()
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+class Discovery:
+    def __init__(self, session: HttpSession = None, cache: DiscoveryCache = None, probe_workers: int = 8) -> None:
+        self.session = session if session is not None else HttpSession.shared()
+        self.cache = cache
+        self.probe_workers = probe_workers
+
+    def discover(self, url: str, name: str = None, refresh: bool = False) -> dict:
+        # The cheapest working feed of a careers page as platform, source, feed, job_board and postings, or None
+        url = careers_url(url)
+        if self.cache is not None and not refresh:
+            cached, result = self.cache.get(url)
+            if cached:
+                return result
+
+        candidates = self.candidates(url, name)
+        with ThreadPoolExecutor(max_workers=self.probe_workers) as executor:
+            probed = list(executor.map(self.probe, candidates))
+        working = [candidate for candidate, works in zip(candidates, probed) if works]
+
+        result = min(working, key=Candidate.rank).as_dict() if working else None
+        if self.cache is not None:
+            self.cache.put(url, result)
+        return result
+
+    def candidates(self, url: str, name: str = None) -> list:
+        # Boards the page itself links to or embeds, then the slugs guessed from the domain on every platform
+        try:
+            response = self.session.get(url)
+            page = f'{url}\n{response.url}\n{response.text}' if response.status_code == 200 else url
+        except Exception:
+            page = url
+
+        candidates = []
+        for platform in PLATFORMS:
+            for slug in platform.slugs(page):
+                if platform.name == 'Dover' and not UUID.fullmatch(slug):
+                    candidates.extend(self.dover_candidates(platform, slug))
+                else:
+                    candidates.append(Candidate(platform, slug, True))
+
+        # A Teamtailor board on the company's own domain lists its postings under /jobs; any HTML page reads
+        # as an empty board, so it only counts with postings
+        if any(marker in page for marker in TEAMTAILOR_MARKERS):
+            parsed = urlparse(url)
+            teamtailor = next(platform for platform in PLATFORMS if platform.name == 'Teamtailor')
+            board = f'{parsed.scheme}://{parsed.netloc}/jobs'
+            candidates.append(Candidate(teamtailor, parsed.netloc, False, board, board))
+
+        found = {(candidate.platform.name, candidate.slug.casefold()) for candidate in candidates}
+        for slug in slug_guesses(url, name):
+            for platform in PLATFORMS:
+                # Dover needs the page id and Teamtailor custom domains are only found by their markers
+                if platform.name != 'Dover' and (platform.name, slug) not in found:
+                    candidates.append(Candidate(platform, slug, False))
+        return candidates
+
+    def dover_candidates(self, platform: Platform, slug: str) -> list:
+        # The careers page of a slug carries the id its API is keyed by
+        try:
+            response = self.session.get(platform.job_board.format(slug=slug))
+            match = UUID.search(response.text) if response.status_code == 200 else None
+        except Exception:
+            match = None
+        if match is None:
+            return []
+        return [Candidate(platform, match.group(0), True, job_board=platform.job_board.format(slug=slug))]
+
+    def probe(self, candidate: Candidate) -> bool:
+        # A feed works when its extractor reads it; guessed boards also need a posting, since some platforms
+        # answer unknown companies with an empty list
+        try:
+            data_fetcher = DataFetcher.create([candidate.feed], candidate.platform.source, candidate.slug,
+                                              candidate.platform.name, self.session)
+            data_fetcher.get_data()
+            jobs = Extractor.create(data_fetcher).iter_jobs()
+            try:
+                # HTML boards stop after their first posting instead of requesting every page
+                if candidate.platform.source == 'html':
+                    candidate.postings = int(next(jobs, None) is not None)
+                else:
+                    candidate.postings = sum(1 for _ in jobs)
+            finally:
+                jobs.close()
+        except Exception:
+            return False
+        return candidate.found or candidate.postings > 0
+
+    def discover_many(self, pages: list, workers: int = 16, refresh: bool = False):
+        # pages are (url, name) pairs, results come back in their order
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(lambda page: self.discover(page[0], page[1], refresh), pages)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Find the ATS platform and cheapest feed of careers pages')
+    parser.add_argument('urls', nargs='*', help='careers page or company website URLs')
+    parser.add_argument('--from-file', default=None, help='read more URLs from this file, one per line')
+    parser.add_argument('--registry', default=None, help='discover every board of this sheet that has no feed yet')
+    parser.add_argument('--cache', default='discovery.sqlite')
+    parser.add_argument('--refresh', action='store_true', help='probe again even if the page is cached')
+    parser.add_argument('--workers', type=int, default=16, help='careers pages discovered at a time')
+    parser.add_argument('--probe-workers', type=int, default=8, help='feeds probed at a time for one page')
+    args = parser.parse_args()
+
+    pages = [(url, None) for url in args.urls]
+    if args.from_file is not None:
+        with open(args.from_file, encoding='utf-8') as file:
+            pages += [(line.strip(), None) for line in file if line.strip()]
+    if args.registry is not None:
+        from registry import Registry
+
+        for board in Registry(args.registry).boards:
+            if board.feed is None and (board.job_board or board.website):
+                pages.append((board.job_board or board.website, board.name))
+
+    cache = DiscoveryCache(args.cache)
+    discovery = Discovery(HttpSession(pool_maxsize=4, connect_timeout=5, read_timeout=15), cache, args.probe_workers)
+    found = 0
+    for (url, name), result in zip(pages, discovery.discover_many(pages, args.workers, args.refresh)):
+        if result is None:
+            print(f"{name or url}\tNOT FOUND")
+            continue
+        found += 1
+        print(f"{name or url}\t{result['platform']}\t{result['source']}\t{result['feed']}\t{result['job_board']}\t"
+              f"{result['postings']}")
+    print(f"DISCOVERY: {found} of {len(pages)} pages on a known platform, {cache.hits} from cache")
+    cache.close()
@@ -0,0 +1,139 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from extractor import Extractor
+from extraction import ExtractedBoard
+from resilience import CircuitBreaker
+
+
+class FetchEngine:
+    def __init__(self, max_concurrency: int = 32, max_per_host: int = 4, extraction_stage=None, metrics=None,
+                 board_timeout: float = 120.0, circuit_breaker: CircuitBreaker = None, max_pending: int = None) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        # Boards between the start of their download and the end of on_result. The consumer is a single thread,
+        # so without a bound the downloads run ahead and every board waiting for it keeps its parsed feed
+        self.max_pending = max_pending if max_pending is not None else max_concurrency
+        # With a ProcessExtractionStage the engine only downloads and the parsing runs on all cores
+        self.extraction_stage = extraction_stage
+        self.metrics = metrics
+        self.host_limits = {}
+        # A board gets board_timeout seconds for its feed download before its slots are given back; further pages
+        # are requested while the board is consumed and are bounded by the session's read timeout instead
+        self.board_timeout = board_timeout
+        # Boards that keep failing are skipped until the cooldown is over, the breaker outlives a single run.
+        # None runs without one
+        self.circuit_breaker = circuit_breaker
+
+    def run(self, data_fetchers: list, on_result) -> None:
+        # on_result(data_fetcher, data_extractor, error) is called as soon as each board's feed is in;
+        # the extractor has not run yet so the caller can stream its iter_jobs(). It runs on one consumer
+        # thread, so boards are consumed one after the other while the loop keeps downloading
+        asyncio.run(self.run_async(data_fetchers, on_result))
+
+    async def run_async(self, data_fetchers: list, on_result) -> None:
+        self.global_limit = asyncio.Semaphore(self.max_concurrency)
+        self.pending_limit = asyncio.Semaphore(self.max_pending)
+        self.host_limits = {}
+
+        # The fetchers are blocking, so they run on a pool sized to the global limit
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        # Extraction, pagination and the caller's writes stay off the event loop
+        consumer = ThreadPoolExecutor(max_workers=1)
+        loop = asyncio.get_running_loop()
+        try:
+            tasks = [asyncio.create_task(self.fetch_board(executor, data_fetcher)) for data_fetcher in data_fetchers]
+
+            for task in asyncio.as_completed(tasks):
+                data_fetcher, data_extractor, error = await task
+                try:
+                    await loop.run_in_executor(consumer, self.consume, on_result, data_fetcher, data_extractor, error)
+                finally:
+                    self.pending_limit.release()
+        finally:
+            # Boards that ran past their deadline are still reading, the run does not wait for them. The board
+            # being consumed is finished, so its state is never left half written
+            executor.shutdown(wait=False)
+            consumer.shutdown(wait=True)
+
+    @staticmethod
+    def consume(on_result, data_fetcher, data_extractor, error) -> None:
+        try:
+            on_result(data_fetcher, data_extractor, error)
+        finally:
+            # The consumer is done with the board, drop the parsed feed so memory does not grow with the run
+            data_fetcher.data = None
+            if data_extractor is not None:
+                data_extractor.data = None
+
+    async def fetch_board(self, executor, data_fetcher):
+        # Released by run_async once the board is consumed
+        await self.pending_limit.acquire()
+        feed = data_fetcher.url[0]
+        if self.circuit_breaker is not None and not self.circuit_breaker.allow(feed):
+            return data_fetcher, None, ValueError('Circuit open')
+
+        host = urlparse(feed).netloc
+        if host not in self.host_limits:
+            self.host_limits[host] = asyncio.Semaphore(self.max_per_host)
+
+        loop = asyncio.get_running_loop()
+        # Take the host slot first so boards queued behind a busy host do not hold a global slot
+        async with self.host_limits[host], self.global_limit:
+            try:
+                if self.extraction_stage is None:
+                    data_extractor = await self.with_deadline(
+                        loop.run_in_executor(executor, self.fetch_and_create, data_fetcher))
+                else:
+                    content = await self.with_deadline(loop.run_in_executor(executor, data_fetcher.fetch_content))
+            except Exception as e:
+                return self.failed(data_fetcher, e)
+            finally:
+                if self.metrics is not None:
+                    self.metrics.add_fetch(data_fetcher)
+
+        # The download slots are free again while the board waits for a worker process
+        if self.extraction_stage is not None:
+            try:
+                data_extractor = await self.extract_in_process(data_fetcher, content)
+            except Exception as e:
+                return self.failed(data_fetcher, e)
+
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.success(feed)
+        return data_fetcher, data_extractor, None
+
+    async def with_deadline(self, future):
+        # The worker thread finishes on its own, its read timeout bounds it, but the board stops waiting
+        try:
+            return await asyncio.wait_for(future, self.board_timeout)
+        except asyncio.TimeoutError:
+            raise ValueError('Board timed out')
+
+    def failed(self, data_fetcher, error):
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.failure(data_fetcher.url[0])
+        if self.metrics is not None:
+            self.metrics.add_error(data_fetcher.company_name, data_fetcher.ats_platform, error)
+        return data_fetcher, None, error
+
+    async def extract_in_process(self, data_fetcher, content):
+        if data_fetcher.not_modified:
+            return ExtractedBoard(data_fetcher, [])
+
+        start = time.perf_counter()
+        jobs_list = await asyncio.wrap_future(self.extraction_stage.submit(content, data_fetcher))
+        data_fetcher.store_content(content)
+        if self.metrics is not None:
+            self.metrics.add_time(data_fetcher.company_name, data_fetcher.ats_platform, 'extract',
+                                  time.perf_counter() - start)
+
+        return ExtractedBoard(data_fetcher, jobs_list)
+
+    @staticmethod
+    def fetch_and_create(data_fetcher):
+        data_fetcher.get_data()
+
+        return Extractor.create(data_fetcher)
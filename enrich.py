@@ -0,0 +1,152 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from parsers import parse_html, parse_json
+from session import HttpSession
+from state import job_hash
+
+# Platforms whose listing has no description, the text is only on the posting's own page
+ENRICH_PLATFORMS = ['smartrecruiters', 'polymer', 'join', 'teamtailor', 'dover']
+
+SMARTRECRUITERS_SECTIONS = ['companyDescription', 'jobDescription', 'qualifications', 'additionalInformation']
+
+
+def description_digest(description: str) -> str:
+    return hashlib.sha256(description.encode('utf-8')).hexdigest()
+
+
+def listing_fingerprint(job) -> str:
+    # The listing without its description, a posting only needs a new detail fetch when this changes
+    return job_hash({key: job[key] for key in job.keys() if key != 'description'})
+
+
+def smartrecruiters_description(content: bytes) -> str:
+    # The posting's ref is the JSON detail endpoint, the text is split in titled sections
+    sections = parse_json(content).get('jobAd', {}).get('sections', {})
+    parts = []
+    for name in SMARTRECRUITERS_SECTIONS:
+        section = sections.get(name) or {}
+        if section.get('text'):
+            parts.append(f"{section.get('title') or ''}\n{section['text']}".strip())
+    return '\n\n'.join(parts) or None
+
+
+def job_posting_description(content: bytes) -> str:
+    # Career pages embed their postings as schema.org JobPosting for search engines
+    soup = parse_html(content)
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            data = json.loads(script.string or '')
+        except ValueError:
+            continue
+        for item in data if isinstance(data, list) else data.get('@graph', [data]):
+            if isinstance(item, dict) and item.get('@type') == 'JobPosting' and item.get('description'):
+                return item['description']
+    return None
+
+
+class DescriptionCache:
+    def __init__(self, path: str = 'descriptions.sqlite', miss_ttl: float = 24 * 60 * 60) -> None:
+        # Descriptions are stored once per content hash, postings only point at them. A posting without a
+        # readable description points at nothing and is fetched again after miss_ttl or when its listing changes
+        self.miss_ttl = miss_ttl
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS descriptions (
+                digest TEXT PRIMARY KEY,
+                description TEXT
+            )
+        """)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS postings (
+                url TEXT PRIMARY KEY,
+                fingerprint TEXT,
+                digest TEXT,
+                fetched_at REAL
+            )
+        """)
+        self.connection.commit()
+
+    def get(self, url: str, fingerprint: str) -> tuple:
+        # (True, description) for a cached answer, description is None for a cached miss
+        with self.lock:
+            row = self.connection.execute("""
+                SELECT postings.digest, descriptions.description, postings.fetched_at
+                FROM postings LEFT JOIN descriptions USING (digest)
+                WHERE postings.url = ? AND postings.fingerprint = ?
+            """, (url, fingerprint)).fetchone()
+            if row is None or (row[0] is None and time.time() - row[2] > self.miss_ttl):
+                return False, None
+            self.hits += 1
+        return True, row[1]
+
+    def put(self, url: str, fingerprint: str, description: str) -> None:
+        digest = description_digest(description) if description is not None else None
+        with self.lock:
+            if digest is not None:
+                self.connection.execute('INSERT OR IGNORE INTO descriptions VALUES (?, ?)', (digest, description))
+            self.connection.execute('INSERT OR REPLACE INTO postings VALUES (?, ?, ?, ?)',
+                                    (url, fingerprint, digest, time.time()))
+            self.connection.commit()
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+class DescriptionEnricher:
+    def __init__(self, session: HttpSession = None, cache: DescriptionCache = None, workers: int = 8) -> None:
+        self.session = session if session is not None else HttpSession.shared()
+        self.cache = cache if cache is not None else DescriptionCache()
+        self.workers = workers
+        self.fetched = 0
+        self.failed = 0
+
+    def enrich(self, platform: str, jobs: list) -> None:
+        # Fills in the description of list-only postings in place, from the cache or the detail pages
+        platform = platform.lower()
+        if platform not in ENRICH_PLATFORMS:
+            return
+
+        missing = []
+        for job in jobs:
+            if job.description is not None or not isinstance(job.url, str) or not job.url.startswith('http'):
+                continue
+            fingerprint = listing_fingerprint(job)
+            cached, description = self.cache.get(job.url, fingerprint)
+            if cached:
+                job.description = description
+            else:
+                missing.append((job, fingerprint))
+
+        if not missing:
+            return
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(missing))) as executor:
+            descriptions = executor.map(lambda item: self.fetch(platform, item[0].url), missing)
+            for (job, fingerprint), description in zip(missing, descriptions):
+                if description is None:
+                    self.failed += 1
+                else:
+                    self.fetched += 1
+                    job.description = description
+                self.cache.put(job.url, fingerprint, description)
+
+    def fetch(self, platform: str, url: str) -> str:
+        # A posting without a readable description keeps None, the cache holds the miss for miss_ttl
+        try:
+            response = self.session.get(url)
+            if response.status_code != 200:
+                raise ValueError(f'HTTP error {response.status_code}')
+            if platform == 'smartrecruiters':
+                description = smartrecruiters_description(response.content)
+            else:
+                description = job_posting_description(response.content)
+        except Exception:
+            return None
+        return description
@@ -0,0 +1,49 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from fetcher import DataFetcher
+from extractor import Extractor
+import parsers
+
+
+def extract_payload(task: tuple) -> list:
+    # Runs in a worker process: raw feed bytes plus board metadata in, normalized jobs out
+    content, source_type, company_name, ats_platform, url = task
+
+    data_fetcher = DataFetcher.create([url], source_type, company_name, ats_platform)
+    data_fetcher.parse(content)
+
+    return list(Extractor.create(data_fetcher).iter_jobs())
+
+
+class ExtractedBoard:
+    # Stands in for an Extractor whose jobs were already extracted in another process
+    def __init__(self, data_fetcher: DataFetcher, jobs_list: list) -> None:
+        self.url = data_fetcher.url
+        self.company_name = data_fetcher.company_name
+        self.ats_platform = data_fetcher.ats_platform.lower()
+        self.jobs_list = jobs_list
+        self.data = None
+
+    def iter_jobs(self):
+        return iter(self.jobs_list)
+
+
+class ProcessExtractionStage:
+    def __init__(self, workers: int = None) -> None:
+        # Boards are submitted one by one as their feeds come in, so there is nothing to send in chunks
+        self.workers = workers or os.cpu_count()
+        # Worker processes parse with the same backends as the parent
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=parsers.select_backends,
+                                            initargs=(parsers.backends['html'], parsers.backends['xml'],
+                                                      parsers.backends['json']))
+
+    @staticmethod
+    def task(content: bytes, data_fetcher: DataFetcher) -> tuple:
+        return content, data_fetcher.source_type, data_fetcher.company_name, data_fetcher.ats_platform, data_fetcher.url[0]
+
+    def submit(self, content: bytes, data_fetcher: DataFetcher):
+        return self.executor.submit(extract_payload, self.task(content, data_fetcher))
+
+    def close(self) -> None:
+        self.executor.shutdown()
@@ -1,22 +1,36 @@
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 
-from bs4 import BeautifulSoup
+from parsers import parse_html
+from normalize import Normalizer
+from record import JobRecord
+from fieldspec import FieldSpec, Field
 
 from fetcher import DataFetcher
 
+import math
 import re
-import requests
-import json
 
 class Extractor:
+    # Concurrent page requests per board for the paginated HTML extractors
+    page_workers = 4
+
     def __init__(self, data_fetcher: DataFetcher) -> None:
         self.url = data_fetcher.url
         self.data = data_fetcher.data
         self.jobs_list = []
         self.company_name = data_fetcher.company_name
         self.ats_platform = data_fetcher.ats_platform.lower()
-        with open('mappings.txt', 'r') as file:
-            self.mappings = json.load(file)
+        self.session = data_fetcher.session
+        # Shared, already compiled lookup tables instead of reading mappings.txt for every board
+        self.normalizer = Normalizer.shared()
+
+    def get_page(self, url: str) -> bytes:
+        # An error page would read as a page without postings and its postings as removed, so the board fails instead
+        response = self.session.get(url)
+        if response.status_code >= 400:
+            raise ValueError(f'HTTP error {response.status_code}')
+        return response.content
     
     @classmethod
     def create(cls, data_fetcher) -> 'Extractor':
@@ -43,483 +57,264 @@ class Extractor:
         else:
             raise ValueError('There is no extractor for the given Job Board')
 
-    @abstractmethod
-    def extract_job_list(self) -> None:
-        pass
-
-
-class PersonioExtractor(Extractor):
-    def __init__(self, data_fetcher):
-        super().__init__(data_fetcher)
-
-    def extract_job_list(self) -> None:
-
-        for position in self.data:
-            # Get the id of the job
-            id = position.find('id').text
-
-            # Get the title of the job
-            title = position.find('name').text
-            
-            # Get the url of the job
-            url = f"https://{re.search(r'https:\/\/([a-zA-Z0-9-]+)\.jobs\.personio\.de', self.url[0]).group(1)}.jobs.personio.de/job/{id}/"
-
-            # Get the departments of the job
-            departments = position.find('department')
-            if departments is not None:
-                departments = departments.text
-
-            # Get the location of the job
-            location = position.find('office').text
-            
-            # Get the employment type of the job
-            employment_type = position.find('employmentType').text
-            employment_type = self.mappings['employment_type'][employment_type] if employment_type in self.mappings['employment_type'] else None
-
-            # Get the description of the job
-            job_description = ''
-            for job_desc in position.find('jobDescriptions').findall('jobDescription'):
-                job_name = job_desc.find('name').text
-                job_value = job_desc.find('value').text.strip()
-                job_description += f"{job_name}\n{job_value}\n\n"
-            
-            # Get the publishing date of the job
-            published_on = position.find('createdAt').text
-
-            job = {
-                'company': self.company_name,
-                'id': id,
-                'title': title,
-                'url': url,
-                'departments': departments,
-                'location': location,
-                'employment_type': employment_type,
-                'description': job_description,
-                'published_on': published_on
-            }
-
-            self.jobs_list.append(job)
-
-
-class AshbyExtractor(Extractor):
-    def __init__(self, data_fetcher):
-        super().__init__(data_fetcher)
-
-    def extract_job_list(self) -> None:
-        jobs_elements = self.data['jobs']
-
-        for position in jobs_elements:
-            # Get the id of the job
-            job_id = position['id']
-
-            # Get the title of the job
-            title = position['title']
-
-            # Get the url of the job
-            url = position['jobUrl']
-
-            # Get the departments of the job
-            departments = position['department']
-
-            # Get the location of the job
-            location = position['location']
-
-            # Get the employment type of the job
-            employment_type = position['employmentType']
-            employment_type = self.mappings['employment_type'][employment_type] if employment_type in self.mappings['employment_type'] else None
-
-            # Get the description of the job
-            description = position['descriptionPlain']
-
-            # Get the publishing date of the job
-            published_on = position['publishedAt']
-
-            job = {
-                'company': self.company_name,
-                'id': job_id,
-                'title': title,
-                'url': url,
-                'departments': departments,
-                'location': location,
-                'employment_type': employment_type,
-                'description': description,
-                'published_on': published_on
-            }
-
-            self.jobs_list.append(job)
-
-
-class GreenhouseExtractor(Extractor):
-    def __init__(self, data_fetcher):
-        super().__init__(data_fetcher)
-
     def extract_job_list(self) -> None:
-        jobs_elements = self.data['jobs']
-
-        for position in jobs_elements:
-            # Get the id of the job
-            job_id = position['id']
-
-            # Get the title of the job
-            title = position['title']
-
-            # Get the url of the job
-            url = position['absolute_url']
-
-            # Get the departments of the job
-            departments = position['departments'] if 'departments' in position else None
-
-            # Get the location of the job
-            location = position['location']['name']
-
-            # Get the employment type of the job
-            employment_type = position['metadata'][0]['value'] if position['metadata'] is not None else None
-            employment_type = self.mappings['employment_type'][employment_type] if employment_type in self.mappings['employment_type'] else None
-
-            # Get the description of the job
-            description = position['content'] if 'content' in position else None
-
-            # Get the publishing date of the job
-            published_on = position['updated_at']
-
-            job = {
-                'company': self.company_name,
-                'id': job_id,
-                'title': title,
-                'url': url,
-                'departments': departments,
-                'location': location,
-                'employment_type': employment_type,
-                'description': description,
-                'published_on': published_on
-            }
-
-            self.jobs_list.append(job)
-
-
-class LeverExtractor(Extractor):
-    def __init__(self, data_fetcher):
-        super().__init__(data_fetcher)
-
-    def extract_job_list(self) -> None:
-        if 'error' in self.data:
-            if self.data['error'] == 'Document not found':
-                self.jobs_list = []
-                return None
-
-        for position in self.data:
-            # Get the job ID
-            job_id = position['id']
-
-            # Get the job title
-            title = position['text']
-
-            # Get the job URL
-            url = position['hostedUrl']
-
-            # Get the departments
-            departments = None
-
-            # Get the location
-            location = position['categories']['location']
-
-            # Get the employment type
-            employment_type = position['categories']['commitment'] if 'commitment' in position['categories'] else None
-            employment_type = self.mappings['employment_type'][employment_type] if employment_type in self.mappings['employment_type'] else None
-
-            # Get the job description
-            description = position['descriptionPlain']
-
-            # Get the publishing date of the job
-            published_on = position['createdAt']
+        self.jobs_list = list(self.iter_jobs())
 
-            job = {
-                'company': self.company_name,
-                'id': job_id,
-                'title': title,
-                'url': url,
-                'departments': departments,
-                'location': location,
-                'employment_type': employment_type,
-                'description': description,
-                'published_on': published_on
-            }
-
-            self.jobs_list.append(job)
-
-
-class SmartRecruitersExtractor(Extractor):
-    def __init__(self, data_fetcher):
-        super().__init__(data_fetcher)
-
-    def extract_job_list(self) -> None:
-        for position in self.data['content']:
-            # Get the job ID
-            job_id = position['id']
-
-            # Get the job title 
-            title = position['name']
-
-            # Get the job URL
-            url = position['ref']
-
-            # Get the departments
-            departments = position['department']['label'] if 'label' in position['department'] else None
-
-            # Get the location
-            location = position['location']['city']
-
-            # Get the employment type
-            employment_type = position['experienceLevel']['label']
-            employment_type = self.mappings['employment_type'][employment_type] if employment_type in self.mappings['employment_type'] else None
-
-            # Get the job description
-            description = None
-
-            # Get the publishing date of the job
-            published_on = position['releasedDate']
-
-            job = {
-                'company': self.company_name,
-                'id': job_id,
-                'title': title,
-                'url': url,
-                'departments': departments,
-                'location': location,
-                'employment_type': employment_type,
-                'description': description,
-                'published_on': published_on
-            }
-
-            self.jobs_list.append(job)
-
-
-class PolymerExtractor(Extractor):
-    def __init__(self, data_fetcher):
-        super().__init__(data_fetcher)
-
-    def extract_job_list(self) -> None:
-        for job in self.data['items']:
-            job_id = job['id']
-            title = job['title']
-            url = job['job_post_url']
-            departments = None
-            location = job['display_location']
-            employment_type = job['kind_pretty']
-            description = None
-            published_on = job['published_at']
-
-            job = {
-                'company': self.company_name,
-                'id': job_id,
-                'title': title,
-                'url': url,
-                'departments': departments,
-                'location': location,
-                'employment_type': employment_type,
-                'description': description,
-                'published_on': published_on
-            }
-
-            self.jobs_list.append(job)
-
-
-class RecruiteeExtractor(Extractor):
-    def __init__(self, data_fetcher):
-        super().__init__(data_fetcher)
-
-    def extract_job_list(self) -> None:
-        for position in self.data['offers']:
-            # Get the job ID
-            job_id = position['id']
-
-            # Get the job title
-            title = position['sharing_title']
-
-            # Get the job URL
-            url = position['careers_url']
-
-            # Get the departments
-            departments = position['department']
-
-            # Get the location
-            location = position['location']
-
-            # Get the employment type
-            employment_type = position['employment_type_code']
-            employment_type = self.mappings['employment_type'][employment_type] if employment_type in self.mappings['employment_type'] else None
-            
-            # Get the job description
-            description = position['description']
-
-            # Get the publishing date of the job
-            published_on = position['published_at']
+    # Yields one job dict at a time so callers can stream postings instead of holding whole boards
+    @abstractmethod
+    def iter_jobs(self):
+        pass
 
-            job = {
-                'company': self.company_name,
-                'id': job_id,
-                'title': title,
-                'url': url,
-                'departments': departments,
-                'location': location,
-                'employment_type': employment_type,
-                'description': description,
-                'published_on': published_on
-            }
 
-            self.jobs_list.append(job)
+class SpecExtractor(Extractor):
+    # Platforms whose postings map field by field, see fieldspec.py; the spec is compiled once per board
+    spec = None
+
+    def iter_jobs(self):
+        extract = self.spec.compile(self.company_name, self.url[0], self.normalizer)
+        yield from extract(self.data)
+
+
+PERSONIO_SUBDOMAIN = re.compile(r'https://([a-zA-Z0-9-]+)\.jobs\.personio\.de')
+
+
+def personio_constants(url: str) -> dict:
+    # The job links are built from the feed's subdomain, looked up once per board instead of per posting
+    return {'subdomain': PERSONIO_SUBDOMAIN.search(url).group(1)}
+
+
+def personio_description(job_descriptions) -> str:
+    if not hasattr(job_descriptions, 'iter'):
+        return ''
+    return ''.join(f"{job_desc.findtext('name')}\n{job_desc.findtext('value').strip()}\n\n"
+                   for job_desc in job_descriptions.iter('jobDescription'))
+
+
+def lever_postings(data):
+    # Lever answers unknown boards with an error object instead of an empty list
+    if 'error' in data:
+        if data['error'] == 'Document not found':
+            return []
+    return data
+
+
+class PersonioExtractor(SpecExtractor):
+    spec = FieldSpec(None, {
+        'id': 'id',
+        'title': 'name',
+        'url': Field('id', template='https://{subdomain}.jobs.personio.de/job/{value}/'),
+        'departments': Field('department', optional=True),
+        'location': 'office',
+        'employment_type': 'employmentType',
+        'description': Field('jobDescriptions', transform=personio_description),
+        'published_on': 'createdAt'
+    }, constants=personio_constants, xml=True)
+
+
+class AshbyExtractor(SpecExtractor):
+    spec = FieldSpec('jobs', {
+        'id': 'id',
+        'title': 'title',
+        'url': 'jobUrl',
+        'departments': 'department',
+        'location': 'location',
+        'employment_type': 'employmentType',
+        'description': 'descriptionPlain',
+        'published_on': 'publishedAt'
+    })
+
+
+class GreenhouseExtractor(SpecExtractor):
+    spec = FieldSpec('jobs', {
+        'id': 'id',
+        'title': 'title',
+        'url': 'absolute_url',
+        'departments': Field('departments', optional=True),
+        'location': 'location.name',
+        'employment_type': Field('metadata.0.value', optional=True),
+        'description': Field('content', optional=True),
+        'published_on': 'updated_at'
+    })
+
+
+class LeverExtractor(SpecExtractor):
+    spec = FieldSpec(lever_postings, {
+        'id': 'id',
+        'title': 'text',
+        'url': 'hostedUrl',
+        'location': 'categories.location',
+        'employment_type': Field('categories.commitment', optional=True),
+        'description': 'descriptionPlain',
+        'published_on': 'createdAt'
+    })
+
+
+class SmartRecruitersExtractor(SpecExtractor):
+    spec = FieldSpec('content', {
+        'id': 'id',
+        'title': 'name',
+        'url': 'ref',
+        'departments': Field('department.label', optional=True),
+        'location': 'location.city',
+        'employment_type': 'experienceLevel.label',
+        'published_on': 'releasedDate'
+    })
+
+
+class PolymerExtractor(SpecExtractor):
+    spec = FieldSpec('items', {
+        'id': 'id',
+        'title': 'title',
+        'url': 'job_post_url',
+        'location': 'display_location',
+        'employment_type': Field('kind_pretty', normalize=False),
+        'published_on': 'published_at'
+    })
+
+
+class RecruiteeExtractor(SpecExtractor):
+    spec = FieldSpec('offers', {
+        'id': 'id',
+        'title': 'sharing_title',
+        'url': 'careers_url',
+        'departments': 'department',
+        'location': 'location',
+        'employment_type': 'employment_type_code',
+        'description': 'description',
+        'published_on': 'published_at'
+    })
 
 
 class JoinExtractor(Extractor):
     def __init__(self, data_fetcher):
         super().__init__(data_fetcher)
 
-    def extract_job_list(self) -> None:
-        jobs = []
-
+    def iter_jobs(self):
         try:
             total_results_text = self.data.find('div', {'data-testid': 'PaginationSummary'}).text
             total_results = int(total_results_text.split(' ')[-2])
         except AttributeError:
             total_results = 0
 
-        page = 1
-        while (page - 1) * 5 < total_results:
-            response = requests.get(f'{self.url[0]}?page={page}')
-            soup = BeautifulSoup(response.text, 'html.parser')
-            job_elements = soup.find_all('a', class_=lambda x: x and x.startswith('JobTile___StyledJobLink-sc-'))
-
-            for job_element in job_elements:
-                title_element = job_element.find('h3')
-                detail_element = job_element.find('div', class_='sc-hLseeU jtGHbV')
-                # Find all the div elements with the relevant class
-                info_divs = detail_element.find_all('div',
-                                          class_=lambda x: x and x.startswith('JobTile-elements___StyledText-sc-'))
-
-                # Initialize variables to store the extracted information
-                location = employment_type = department = None
-                location = detail_element.find
-
-                # Iterate through the div elements and extract the information based on the presence of icons
-                for div in info_divs:
-                    text = div.get_text(strip=True)
-                    if 'LocationPinIcon' in str(div):
-                        location = text
-                    elif 'BriefcaseIcon' in str(div):
-                        employment_type = text
-                    elif 'FolderIcon' in str(div):
-                        department = text
-
-                job = {
-                    'id': job_element['href'].split('/')[-1][:8],
-                    'company': self.company_name,
-                    'title': title_element.text,
-                    'url': job_element['href'],
-                    'departments': department,
-                    'location': location,
-                    'employment_type': employment_type,
-                    'description': None,
-                    'published_on': None
-                }
-                jobs.append(job)
-
-            page += 1
-
-        self.jobs_list = jobs
+        if total_results == 0:
+            return
+
+        # The summary gives the page count up front, so every page after the first is requested at once
+        executor = ThreadPoolExecutor(max_workers=self.page_workers)
+        try:
+            futures = [executor.submit(self.fetch_page, page) for page in range(2, math.ceil(total_results / 5) + 1)]
+
+            yield from self.extract_page(self.data)
+            for future in futures:
+                yield from future.result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def fetch_page(self, page: int) -> list:
+        return list(self.extract_page(parse_html(self.get_page(f'{self.url[0]}?page={page}'))))
+
+    def extract_page(self, soup):
+        job_elements = soup.find_all('a', class_=lambda x: x and x.startswith('JobTile___StyledJobLink-sc-'))
+
+        for job_element in job_elements:
+            title_element = job_element.find('h3')
+            detail_element = job_element.find('div', class_='sc-hLseeU jtGHbV')
+            # Find all the div elements with the relevant class
+            info_divs = detail_element.find_all('div',
+                                      class_=lambda x: x and x.startswith('JobTile-elements___StyledText-sc-'))
+
+            # Initialize variables to store the extracted information
+            location = employment_type = department = None
+            location = detail_element.find
+
+            # Iterate through the div elements and extract the information based on the presence of icons
+            for div in info_divs:
+                text = div.get_text(strip=True)
+                if 'LocationPinIcon' in str(div):
+                    location = text
+                elif 'BriefcaseIcon' in str(div):
+                    employment_type = text
+                elif 'FolderIcon' in str(div):
+                    department = text
+
+            job = JobRecord(
+                id=job_element['href'].split('/')[-1][:8],
+                company=self.company_name,
+                title=title_element.text,
+                url=job_element['href'],
+                departments=self.normalizer.department(department),
+                location=self.normalizer.location(location),
+                employment_type=employment_type,
+                description=None,
+                published_on=None
+            )
+            yield job
 
 
 class TeamtailorExtractor(Extractor):
     def __init__(self, data_fetcher):
         super().__init__(data_fetcher)
 
-    def extract_job_list(self) -> None:
-        jobs = []
+    def iter_jobs(self):
+        jobs, show_more = self.extract_page(self.data)
+        yield from jobs
+        if not show_more:
+            return
 
-        show_more = True
-        page = 1
-        while show_more:
-           
-            response = requests.get(f'{self.url[0]}?page={page}')
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            show_more_button = soup.find('div', id='show_more_button')
-            if show_more_button is not None:
+        # The page count is unknown, so the next pages are read ahead and dropped once a page has no show more button
+        executor = ThreadPoolExecutor(max_workers=self.page_workers)
+        futures = {}
+        try:
+            futures = {page: executor.submit(self.fetch_page, page) for page in range(2, 2 + self.page_workers)}
+            page = 1
+            while show_more:
                 page += 1
-            else:
-                show_more = False
-
-            job_list = soup.find('ul', id='jobs_list_container')
-            job_elements = job_list.find_all('li')
-
-            for job_element in job_elements:
-                title_element = job_element.find('span', class_='text-block-base-link').get_text(strip=True)
-                url = job_element.find('a', href=True)['href']
-                detail_information = job_element.find('div', class_='mt-1 text-md').get_text(' ', strip=True).split('·')
-                
-                department = detail_information[0] if len(detail_information) > 0 else None
-                location = detail_information[1] if len(detail_information) > 1 else None 
-
-                job = {
-                    'id': url.split('/')[-1][:7],
-                    'company': self.company_name,
-                    'title': title_element,
-                    'url': url,
-                    'departments': department,
-                    'location': location,
-                    'employment_type': None,
-                    'description': None,
-                    'published_on': None
-                }
-                jobs.append(job)
-
-         
-
-        self.jobs_list = jobs
-
-
-class DoverExtractor(Extractor):
-    def __init__(self, data_fetcher):
-        super().__init__(data_fetcher)
-
-    def extract_job_list(self) -> None:
-        jobs_elements = self.data['results']
-
-        for position in jobs_elements:
-            # Get the id of the job
-            job_id = position['id']
+                futures[page + self.page_workers] = executor.submit(self.fetch_page, page + self.page_workers)
+                jobs, show_more = futures.pop(page).result()
+                yield from jobs
+        finally:
+            for future in futures.values():
+                future.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
 
-            # Get the title of the job
-            title = position['title']
+    def fetch_page(self, page: int):
+        return self.extract_page(parse_html(self.get_page(f'{self.url[0]}?page={page}')))
 
-            # Get the url of the job
-            url = f"https://app.dover.com/apply/{self.company_name}/"+position['id']
+    def extract_page(self, soup):
+        show_more_button = soup.find('div', id='show_more_button')
 
-            # Get the departments of the job
-            departments = None
+        job_list = soup.find('ul', id='jobs_list_container')
+        job_elements = job_list.find_all('li')
 
-            # Get the location of the job
-            location = position['locations'][0]['location_option']['city']
-
-            # Get the employment type of the job
-            employment_type = None
-            employment_type = self.mappings['employment_type'][employment_type] if employment_type in self.mappings['employment_type'] else None
-
-            # Get the description of the job
-            description = None
-
-            # Get the publishing date of the job
-            published_on = None
-
-            job = {
-                'company': self.company_name,
-                'id': job_id,
-                'title': title,
-                'url': url,
-                'departments': departments,
-                'location': location,
-                'employment_type': employment_type,
-                'description': description,
-                'published_on': published_on
-            }
-
-            self.jobs_list.append(job)
\ No newline at end of file
+        jobs = []
+        for job_element in job_elements:
+            title_element = job_element.find('span', class_='text-block-base-link').get_text(strip=True)
+            url = job_element.find('a', href=True)['href']
+            detail_information = job_element.find('div', class_='mt-1 text-md').get_text(' ', strip=True).split('·')
+
+            department = detail_information[0] if len(detail_information) > 0 else None
+            location = detail_information[1] if len(detail_information) > 1 else None
+
+            job = JobRecord(
+                id=url.split('/')[-1][:7],
+                company=self.company_name,
+                title=title_element,
+                url=url,
+                departments=self.normalizer.department(department),
+                location=self.normalizer.location(location),
+                employment_type=None,
+                description=None,
+                published_on=None
+            )
+            jobs.append(job)
+
+        return jobs, show_more_button is not None
+
+
+class DoverExtractor(SpecExtractor):
+    spec = FieldSpec('results', {
+        'id': 'id',
+        'title': 'title',
+        'url': Field('id', template='https://app.dover.com/apply/{company}/{value}'),
+        'location': 'locations.0.location_option.city'
+    })
@@ -1,65 +1,129 @@
 from abc import abstractmethod
 
-import requests
-from bs4 import BeautifulSoup
-from xml.etree import ElementTree as ET
+from session import HttpSession
+from cache import ResponseCache
+from parsers import parse_html, iter_xml, parse_json
 import re
+import time
 
 
 
 
 class DataFetcher:
-    def __init__(self, url: list, source_type: str, company_name: str, ats_platform: str) -> None:
+    def __init__(self, url: list, source_type: str, company_name: str, ats_platform: str, session: HttpSession = None,
+                 cache: ResponseCache = None) -> None:
         self.url = url
         self.source_type = source_type
         self.ats_platform = ats_platform
         self.data = None
         self.company_name = company_name
+        self.headers = {}
+        self.session = session if session is not None else HttpSession.shared()
+        self.cache = cache
+        self.not_modified = False
+        self.cache_entry = None
+        self.validators = (None, None)
+        self.pending_cache = None
+        # Seconds per stage (connect, download, parse) and bytes on the wire, read by the metrics
+        self.timings = {}
+        self.bytes_received = 0
 
     @classmethod
-    def create(cls, url, source_type, company_name, ats_platform):
+    def create(cls, url, source_type, company_name, ats_platform, session=None, cache=None):
         if source_type == 'html':
-            return HTMLDataFetcher(url, source_type, company_name, ats_platform)
+            return HTMLDataFetcher(url, source_type, company_name, ats_platform, session, cache)
         elif source_type == 'xml':
-            return XMLDataFetcher(url, source_type,company_name, ats_platform)
+            return XMLDataFetcher(url, source_type,company_name, ats_platform, session, cache)
         elif source_type == 'json':
-            return JSONDataFetcher(url, source_type,company_name, ats_platform)
+            return JSONDataFetcher(url, source_type,company_name, ats_platform, session, cache)
         else:
             raise ValueError('Invalid source type')
         x
 
+    def get_data(self):
+        content = self.fetch_content()
+
+        # Unchanged feed, its postings are in the state store already and the board is skipped unparsed
+        if self.not_modified:
+            return
+
+        self.timed_parse(content)
+        self.store_content(content)
+
+    def timed_parse(self, content: bytes) -> None:
+        start = time.perf_counter()
+        self.parse(content)
+        self.timings['parse'] = time.perf_counter() - start
+
+    def fetch_content(self) -> bytes:
+        # Raw bytes of the feed, taken from the cache when the server answers 304
+        headers = dict(self.headers)
+        self.cache_entry = self.cache.get(self.url[0]) if self.cache is not None else None
+        if self.cache_entry is not None:
+            headers.update(self.cache_entry.conditional_headers())
+
+        start = time.perf_counter()
+        response = self.session.get(self.url[0], headers=headers)
+
+        # elapsed covers DNS, connect and waiting for the headers, the rest is reading the body
+        total = time.perf_counter() - start
+        self.timings['connect'] = response.elapsed.total_seconds()
+        self.timings['download'] = max(total - self.timings['connect'], 0)
+        self.bytes_received = getattr(response, 'bytes_received', len(response.content))
+
+        if response.status_code == 304 and self.cache_entry is not None:
+            self.not_modified = True
+            self.cache.touch(self.url[0])
+            return self.cache_entry.body
+
+        # Retries are spent at this point, an error page must not be parsed as the board's postings
+        if response.status_code >= 400:
+            raise ValueError(f'HTTP error {response.status_code}')
+
+        self.validators = (response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        if response.status_code != 200:
+            self.validators = (None, None)
+        return response.content
+
+    def store_content(self, content: bytes) -> None:
+        # Held back until the board is extracted and its state committed, see commit_cache
+        self.pending_cache = content
+
+    def commit_cache(self) -> None:
+        # The validators make the next run answer with a 304, so they may only be stored for a board whose
+        # postings reached the state store; a failed board keeps the cache entry of its last good run
+        if self.cache is not None and self.pending_cache is not None:
+            self.cache.put(self.url[0], *self.validators, self.pending_cache)
+        self.pending_cache = None
+
+    # Parsing is kept apart from the request so the raw bytes can come from anywhere
+    @abstractmethod
+    def parse(self, content: bytes) -> None:
+        pass
+
 
 class HTMLDataFetcher(DataFetcher):
-    def __init__(self, url, source_type, company_name, ats_platform):
-        super().__init__(url, source_type, company_name, ats_platform)
+    def __init__(self, url, source_type, company_name, ats_platform, session=None, cache=None):
+        super().__init__(url, source_type, company_name, ats_platform, session, cache)
 
-    def get_data(self):
-        response = requests.get(self.url[0])
-        soup = BeautifulSoup(response.text, 'html.parser')
+    def parse(self, content):
+        soup = parse_html(content)
         self.data = soup
 
 
 class XMLDataFetcher(DataFetcher):
-    def __init__(self, url, source_type, company_name, ats_platform):
-        super().__init__(url, source_type, company_name, ats_platform)
+    def __init__(self, url, source_type, company_name, ats_platform, session=None, cache=None):
+        super().__init__(url, source_type, company_name, ats_platform, session, cache)
+        self.headers = {"accept": "application/xml"}
 
-    def get_data(self):
-        headers = {"accept": "application/xml"}
-
-        response = requests.get(self.url[0], headers=headers)
-        # Parse the XML data
-        try:
-            root = ET.fromstring(response.text)
-        except ET.ParseError:
-            raise ValueError('Invalid XML data')
-
-        self.data = root.findall('position')
+    def parse(self, content):
+        # Positions are parsed one by one while the extractor consumes them, raises 'Invalid XML data' on malformed feeds
+        self.data = iter_xml(content, 'position')
 
 
 class JSONDataFetcher(DataFetcher):
-    def __init__(self, url, source_type, company_name, ats_platform):
-            super().__init__(url, source_type, company_name, ats_platform)
+    def __init__(self, url, source_type, company_name, ats_platform, session=None, cache=None):
+            super().__init__(url, source_type, company_name, ats_platform, session, cache)
 
-    def get_data(self):
-        response = requests.get(self.url[0])
-        self.data = response.json()
\ No newline at end of file
+    def parse(self, content):
+        self.data = parse_json(content)
\ No newline at end of file
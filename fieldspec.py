@@ -0,0 +1,134 @@
+from operator import itemgetter
+
+from record import FIELDS, JobRecord
+
+# Fields that go through the shared Normalizer unless their Field says otherwise
+NORMALIZED_FIELDS = {
+    'departments': 'department',
+    'location': 'location',
+    'employment_type': 'employment_type'
+}
+
+LOOKUP_ERRORS = (KeyError, IndexError, TypeError)
+
+
+def compile_path(path: str, optional: bool = False, default=None):
+    # 'location.name' or 'locations.0.city'; digits index into lists
+    keys = [int(key) if key.isdigit() else key for key in path.split('.')]
+
+    if not optional:
+        if len(keys) == 1:
+            return itemgetter(keys[0])
+
+        def get(item):
+            for key in keys:
+                item = item[key]
+            return item
+        return get
+
+    # Optional paths give the default as soon as a step is missing or None
+    def get(item):
+        for key in keys:
+            if item is None:
+                return default
+            try:
+                item = item[key]
+            except LOOKUP_ERRORS:
+                return default
+        return default if item is None else item
+    return get
+
+
+class Field:
+    def __init__(self, path: str, optional: bool = False, default=None, transform=None, template: str = None,
+                 normalize: bool = True) -> None:
+        self.path = path
+        self.optional = optional
+        self.default = default
+        # transform(value) runs on the raw value; template is formatted with the board constants and {value}
+        self.transform = transform
+        self.template = template
+        self.normalize = normalize
+
+    def getter(self, name: str, constants: dict, normalizer):
+        # A function of the posting that reads, formats, transforms and normalizes this field
+        get = compile_path(self.path, self.optional, self.default)
+
+        if self.template is not None:
+            # Board constants are filled in here once, per posting only the value is concatenated
+            prefix, suffix = self.template.format(value='{value}', **constants).split('{value}', 1)
+            get = templated(get, prefix, suffix)
+
+        if self.transform is not None:
+            get = chained(get, self.transform)
+
+        if self.normalize and name in NORMALIZED_FIELDS:
+            get = chained(get, getattr(normalizer, NORMALIZED_FIELDS[name]))
+
+        return get
+
+
+def templated(get, prefix: str, suffix: str):
+    return lambda item: prefix + str(get(item)) + suffix
+
+
+def chained(get, then):
+    return lambda item: then(get(item))
+
+
+def missing(item):
+    return None
+
+
+def element_fields(element) -> dict:
+    # XML postings become a dict of their children: text for leaves, the element itself for nested ones
+    return {child.tag: child if len(child) else child.text for child in element}
+
+
+class FieldSpec:
+    def __init__(self, items, fields: dict, constants=None, xml: bool = False) -> None:
+        # items is the path to the postings in the feed or a function of the feed, None is the feed itself
+        if items is None:
+            self.items = iter
+        elif callable(items):
+            self.items = items
+        else:
+            self.items = compile_path(items)
+        # fields maps every JobRecord field but company to a path, a Field or None
+        unknown = set(fields) - set(FIELDS[1:])
+        if unknown:
+            raise ValueError(f"Unknown fields {', '.join(sorted(unknown))}")
+        self.fields = fields
+        # constants(url) gives the per-board values the templates use, next to company
+        self.constants = constants
+        self.xml = xml
+
+    def getter(self, name: str, constants: dict, normalizer):
+        field = self.fields.get(name)
+        if field is None:
+            return missing
+        field = Field(field) if isinstance(field, str) else field
+        return field.getter(name, constants, normalizer)
+
+    def compile(self, company: str, url: str, normalizer):
+        constants = {'company': company}
+        if self.constants is not None:
+            constants.update(self.constants(url))
+
+        # The spec becomes a tuple of getters, one per JobRecord field after company, with the per-board
+        # constants resolved here once
+        getters = tuple(self.getter(name, constants, normalizer) for name in FIELDS[1:])
+        items = self.items
+
+        # Called by name rather than in a loop over the tuple, which about halves the cost of a posting
+        (get_id, get_title, get_url, get_departments, get_location, get_employment_type, get_description,
+         get_published_on) = getters
+
+        def record(item):
+            return JobRecord(company, get_id(item), get_title(item), get_url(item), get_departments(item),
+                             get_location(item), get_employment_type(item), get_description(item),
+                             get_published_on(item))
+
+        if self.xml:
+            return lambda data: map(record, map(element_fields, items(data)))
+        return lambda data: map(record, items(data))
@@ -1,50 +1,410 @@
-import numpy as np
-
 from fetcher import DataFetcher
-from extractor import Extractor
+from engine import FetchEngine
+from session import HttpSession
+from cache import ResponseCache
+from state import StateStore, Delta
+from pipeline import batched
+from sinks import Sink, ThreadedSink
+from extraction import ProcessExtractionStage
+from metrics import Metrics
+from record import to_frame
+from scheduler import Scheduler
+from resilience import RetryPolicy, CircuitBreaker
+from sharding import WorkQueue, parse_shard, shard_boards, merge_rows
+from registry import Registry
+from dedup import DedupIndex
+from enrich import DescriptionEnricher, DescriptionCache
+from search import SearchIndex
+from checkpoint import RunJournal
+from archive import PayloadArchive, ArchivingSession, ReplaySession
+import parsers
+import argparse
+import datetime
 import os
-import pandas as pd
+import socket
+import time
+
 
-data = pd.read_excel('JobBoards.xlsx')
+def report_error(e, name):
+    if e.args[0] == 'Invalid source type':
+        print(f"ERROR: Invalid source type for {name}")
+    elif e.args[0] == 'There is no extractor for the given Job Board':
+        print(f"ERROR: There is no extractor for the given Job Board {name}")
+    elif e.args[0] == 'Invalid XML data':
+        print(f"ERROR: Invalid XML data for {name}")
+    else:
+        print(f"ERROR: {e} for {name}")
 
 
-data = data.dropna(subset=['Implemented'])
-data = data[data['Platform'] == 'Dover']
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--no-cache', action='store_true', help='ignore cached responses for this run')
+    parser.add_argument('--cache-path', default='responses.sqlite')
+    parser.add_argument('--state-path', default=None, help='defaults to jobs_state.sqlite, required with --queue')
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--sink', default='jsonl', choices=['jsonl', 'csv', 'parquet', 'excel'])
+    parser.add_argument('--output', default=None,
+                        help='defaults to jobs_delta with the extension of the sink; appended to, every row has its run_at')
+    parser.add_argument('--partition-by', nargs='*', default=None, help='e.g. platform company')
+    parser.add_argument('--compression', default=None)
+    parser.add_argument('--full-export', action='store_true', help='also write every known job to jobs_list.xlsx')
+    parser.add_argument('--html-parser', default='auto', choices=['auto'] + parsers.HTML_BACKENDS)
+    parser.add_argument('--xml-parser', default='auto', choices=['auto'] + parsers.XML_BACKENDS)
+    parser.add_argument('--json-parser', default='auto', choices=['auto'] + parsers.JSON_BACKENDS)
+    parser.add_argument('--extract-workers', type=int, default=0, help='parse feeds in this many processes, 0 parses in threads')
+    parser.add_argument('--metrics-jsonl', default=None, help='append per-board timings to this file')
+    parser.add_argument('--metrics-prom', default=None, help='write per-board timings in Prometheus text format')
+    parser.add_argument('--slowest', type=int, default=10, help='boards shown in the summary at the end of the run')
+    parser.add_argument('--schedule', action='store_true', help='keep running and refresh every board at its own interval')
+    parser.add_argument('--min-interval', type=float, default=15 * 60, help='seconds between two fetches of a busy board')
+    parser.add_argument('--max-interval', type=float, default=24 * 60 * 60, help='seconds between two fetches of a static board')
+    parser.add_argument('--host-delay', type=float, default=2.0, help='seconds between two scheduled boards on the same host')
+    parser.add_argument('--host-rate', type=float, default=None, help='requests per second and host, unlimited by default')
+    parser.add_argument('--retries', type=int, default=3, help='retries on 429, 5xx, timeouts and dropped connections')
+    parser.add_argument('--board-timeout', type=float, default=120.0, help='seconds a board may take to download')
+    parser.add_argument('--breaker-threshold', type=int, default=3, help='failures in a row before a board is skipped')
+    parser.add_argument('--breaker-cooldown', type=float, default=300.0, help='seconds a failing board is skipped')
+    parser.add_argument('--shard', default=None, help='index/count, e.g. 0/4 runs the first of four shards')
+    parser.add_argument('--queue', default=None, help='claim boards from this shared work queue, idle workers steal pending boards')
+    parser.add_argument('--queue-reset', action='store_true', help='start a new queue run even if the last one is unfinished')
+    parser.add_argument('--claim-size', type=int, default=16, help='boards claimed from the queue at a time')
+    parser.add_argument('--merge', nargs='+', default=None, help='merge these partial outputs into --output and exit')
+    parser.add_argument('--registry', default='JobBoards.xlsx')
+    parser.add_argument('--platform', nargs='*', default=None, help='only run boards on these platforms')
+    parser.add_argument('--name', nargs='*', default=None, help='only run these boards')
+    parser.add_argument('--dedup', action='store_true', help='leave reposted and mirrored postings out of the delta')
+    parser.add_argument('--enrich', action='store_true', help='fetch descriptions of new and changed postings on list-only platforms')
+    parser.add_argument('--descriptions-path', default='descriptions.sqlite')
+    parser.add_argument('--enrich-workers', type=int, default=8)
+    parser.add_argument('--search-index', default=None, help='keep this full-text and facet index up to date with the delta')
+    parser.add_argument('--checkpoint', action='store_true', help='commit every board on its own so an interrupted run can resume')
+    parser.add_argument('--resume', action='store_true', help='continue the last interrupted checkpointed run, implies --checkpoint')
+    parser.add_argument('--checkpoint-dir', default='runs', help='board outputs of checkpointed runs until they are merged')
+    parser.add_argument('--archive', action='store_true', help='keep the raw payload of every fetched page in the archive')
+    parser.add_argument('--archive-path', default='archive')
+    parser.add_argument('--replay', action='store_true', help='extract the archived payloads again instead of fetching, writes every posting')
+    parser.add_argument('--replay-since', default=None, help='first archived run to replay, an ISO date or timestamp prefix')
+    parser.add_argument('--replay-until', default=None, help='replay the archived runs before this ISO date or timestamp')
+    args = parser.parse_args()
 
-data_dict = data[['Name', 'Job Feed', 'Platform', 'Source']]
+    # Queue workers steal boards of other shards, so the last state of every board has to be in one store they share
+    if args.queue is not None and args.state_path is None:
+        parser.error('--queue needs a --state-path shared by every worker')
+    args.state_path = args.state_path or 'jobs_state.sqlite'
 
-jobs_list = []
+    parsers.select_backends(html=args.html_parser, xml=args.xml_parser, json=args.json_parser)
+
+    # Every shard writes its own partial output, --merge combines them afterwards
+    shard_index, shard_count = parse_shard(args.shard) if args.shard is not None else (0, 1)
+    sink_extensions = {'jsonl': '.jsonl', 'csv': '.csv', 'parquet': '.parquet', 'excel': '.xlsx'}
+    if args.output is not None:
+        output_path = args.output
+    elif args.shard is not None:
+        output_path = f'jobs_delta-{shard_index}of{shard_count}{sink_extensions[args.sink]}'
+    elif args.replay:
+        output_path = f'jobs_replay{sink_extensions[args.sink]}'
+    else:
+        output_path = f'jobs_delta{sink_extensions[args.sink]}'
 
-for job_board in data_dict.iterrows():
-    # if link is not None
-    if job_board[1]['Job Feed'] is not None:
+    if args.merge is not None:
+        sink = Sink.create(output_path, args.sink, args.partition_by, args.compression)
+        rows = 0
+        for batch in batched(merge_rows(args.merge), args.batch_size):
+            sink.write(list(batch))
+            rows += len(batch)
+        sink.close()
+        print(f"MERGE: {rows} jobs from {len(args.merge)} partial outputs written to {output_path}")
+        return
+
+    # Read from a compiled cache, the sheet itself is only parsed again when it changed
+    registry = Registry(args.registry)
+
+    # Only the changes against the stored state of the last run are exported
+    state = StateStore(args.state_path)
+    delta = Delta()
+    run_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    metrics = Metrics()
+
+    # A checkpointed run commits each board's state together with its journal entry and keeps its rows in a
+    # board file, the delta is only written once the run is through. Scheduled runs never end and the work
+    # queue keeps its own progress, so both run without
+    journal = None
+    if (args.checkpoint or args.resume) and not args.schedule and args.queue is None and not args.replay:
         try:
-            data_fetcher = DataFetcher.create([job_board[1]['Job Feed']], job_board[1]['Source'], job_board[1]['Name'], job_board[1]['Platform'])
+            journal = RunJournal(state.connection, args.checkpoint_dir, resume=args.resume)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            state.close()
+            return
+        if journal.resumed:
+            print(f"RESUME: run {journal.run_id}, {len(journal.completed())} boards already done")
+
+    # Seeded with the known postings, so a posting that mirrors one from an earlier run is caught as well
+    dedup = None
+    if args.dedup:
+        dedup = DedupIndex()
+        for platform, job in state.iter_platform_jobs():
+            dedup.add(dict(job, platform=platform))
+        dedup.duplicates = 0
 
-            data_fetcher.get_data()
+    # Updated with the same rows as the sink, so the index follows the state run by run
+    search_index = SearchIndex(args.search_index) if args.search_index is not None else None
 
-            data_extractor = Extractor.create(data_fetcher)
+    # The delta is appended batch by batch on a writer thread, so a failing board does not lose earlier ones
+    sink = ThreadedSink(Sink.create(output_path, args.sink, args.partition_by, args.compression))
 
-            data_extractor.extract_job_list()
+    # Boards of the current run whose postings changed, the scheduler fetches those more often
+    changed = {}
 
-            jobs_list.append(data_extractor.jobs_list)
-            print(f"SUCCESS: Data fetched for {job_board[1]['Name']}")
+    def collect_jobs(data_fetcher, data_extractor, error):
+        company, platform = data_fetcher.company_name, data_fetcher.ats_platform
+        if error is not None:
+            report_error(error, company)
+            return
+
+        # A 304 on the feed means the postings cannot have changed
+        if data_fetcher.not_modified:
+            changed[data_fetcher.url[0]] = False
+            if journal is not None:
+                journal.record(data_fetcher.url[0], company)
+                state.commit()
+            print(f"SUCCESS: No changes for {company}")
+            return
+
+        # Stream the board's postings through the state store in bounded batches
+        board_delta = Delta()
+        start = time.perf_counter()
+        extract_before = metrics.board(company, platform).stages.get('extract', 0)
+        enrich_time = 0
+        board_file = journal.open_board(data_fetcher.url[0]) if journal is not None else None
+        changes = None
+
+        def enriched(jobs):
+            # Descriptions are filled in before the state store hashes and stores the postings. Only new and changed
+            # listings get their detail page, the others are answered from the description cache
+            nonlocal enrich_time
+            for jobs_batch in batched(jobs, args.batch_size):
+                enrich_start = time.perf_counter()
+                enricher.enrich(platform, jobs_batch)
+                enrich_time += time.perf_counter() - enrich_start
+                yield from jobs_batch
+
+        try:
+            jobs = metrics.timed_iter(data_extractor.iter_jobs(), company, platform, 'extract', count_jobs=True)
+            if enricher is not None:
+                jobs = enriched(jobs)
+            changes = state.changes(company, jobs, args.batch_size, commit=journal is None, platform=platform)
+            for batch in batched(changes, args.batch_size):
+                for change, _ in batch:
+                    board_delta.count(change)
+                    delta.count(change)
+                exported = ((change, dict(job, platform=data_extractor.ats_platform)) for change, job in batch)
+                # Duplicates stay in the state store, only the first posting of a group is exported
+                if dedup is not None:
+                    exported = dedup.exported(exported)
+                rows = [dict(row, change=change, run_at=run_at) for change, row in exported]
+                if rows and board_file is not None:
+                    board_file.write(rows)
+                elif rows:
+                    sink.write(rows)
+                    if search_index is not None:
+                        search_index.update(rows)
+
+            # The board file takes its name before the commit, so a committed board always has its rows
+            if journal is not None:
+                journal.record(data_fetcher.url[0], company, board_file)
+                state.commit()
         except Exception as e:
-            if e.args[0] == 'Invalid source type':
-                print(f"ERROR: Invalid source type for {job_board[1]['Name']}")
-            elif e.args[0] == 'There is no extractor for the given Job Board':
-                print(f"ERROR: There is no extractor for the given Job Board {job_board[1]['Name']}")
-            elif e.args[0] == 'Invalid XML data':
-                print(f"ERROR: Invalid XML data for {job_board[1]['Name']}")
-            else:
-                print(f"ERROR: {e} for {job_board[1]['Name']}")
-    else:
-        print(f"NO data for {job_board[1]['Name']}")
+            # Closing the changes rolls back what the board has not committed, a checkpointed board runs again on resume
+            if changes is not None:
+                changes.close()
+            if board_file is not None:
+                board_file.abort()
+            metrics.add_error(company, platform, e)
+            report_error(e, company)
+            return
+        finally:
+            # Whatever the board spent outside of extraction went into the state store and the sink
+            extract_time = metrics.board(company, platform).stages.get('extract', 0) - extract_before
+            metrics.add_time(company, platform, 'enrich', enrich_time)
+            metrics.add_time(company, platform, 'write', time.perf_counter() - start - extract_time - enrich_time)
+
+        data_fetcher.commit_cache()
+        changed[data_fetcher.url[0]] = len(board_delta) > 0
+        print(f"SUCCESS: Data fetched for {company} "
+              f"(+{board_delta.added} ~{board_delta.updated} -{board_delta.removed})")
+
+    # One pooled keep-alive session for every fetcher and paginated extractor
+    session = HttpSession(pool_maxsize=4, connect_timeout=5, read_timeout=30, host_rate=args.host_rate,
+                          retry_policy=RetryPolicy(args.retries))
+    # Conditional requests against the feeds of the last run
+    # A resumed run fetches its remaining boards in full, a 304 must not stand in for a board the journal
+    # has not recorded
+    cache = ResponseCache(args.cache_path, bypass=args.no_cache or (journal is not None and journal.resumed))
+    # Descriptions live in a content-addressed cache, a posting is only fetched again when its listing changes
+    enricher = None
+    if args.enrich:
+        enricher = DescriptionEnricher(session, DescriptionCache(args.descriptions_path), args.enrich_workers)
+
+    boards = {}
+
+    for board in registry.filter(args.platform, args.name):
+        # if link is not None
+        if board.feed is not None:
+            boards[board.feed] = board
+        else:
+            print(f"NO data for {board.name}")
+
+    # Raw payloads of every run go into compressed segments, --replay reads them back instead of fetching
+    archive = PayloadArchive(args.archive_path) if args.archive or args.replay else None
+    fetch_session = ArchivingSession(session, archive) if args.archive and not args.replay else session
+
+    # CPU-bound parsing can move to worker processes while the engine keeps downloading. Worker processes
+    # request further pages with their own session, which neither archives nor replays them
+    extraction_stage = None
+    if args.extract_workers > 0 and archive is None:
+        extraction_stage = ProcessExtractionStage(args.extract_workers)
+
+    # Replayed boards fail on what is missing from the archive, that must not skip the board in the next archived run
+    circuit_breaker = CircuitBreaker(args.breaker_threshold, args.breaker_cooldown) if not args.replay else None
+    engine = FetchEngine(max_concurrency=32, max_per_host=4, extraction_stage=extraction_stage, metrics=metrics,
+                         board_timeout=args.board_timeout, circuit_breaker=circuit_breaker)
+
+    def run_boards(feeds):
+        nonlocal run_at
+        run_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        changed.clear()
+        if archive is not None:
+            archive.begin(run_at)
+
+        # Fetchers keep the response of their run, so every run gets fresh ones
+        data_fetchers = []
+        for feed in feeds:
+            board = boards[feed]
+            try:
+                data_fetchers.append(DataFetcher.create([feed], board.source, board.name, board.platform, fetch_session,
+                                                        cache))
+                if archive is not None:
+                    archive.add_board(feed, board.name, board.platform, board.source)
+            except Exception as e:
+                report_error(e, board.name)
+
+        # Fetch and extract all boards concurrently, results come back in completion order
+        engine.run(data_fetchers, collect_jobs)
+        return dict(changed)
+
+    replayed = 0
+
+    def collect_replayed(data_fetcher, data_extractor, error):
+        # Every posting of the archived payload is written with the time of its original run, the state is left alone
+        nonlocal replayed
+        company, platform = data_fetcher.company_name, data_fetcher.ats_platform
+        if error is not None:
+            report_error(error, company)
+            return
+        try:
+            jobs = metrics.timed_iter(data_extractor.iter_jobs(), company, platform, 'extract', count_jobs=True)
+            for batch in batched(jobs, args.batch_size):
+                sink.write([dict(job, platform=data_extractor.ats_platform, run_at=data_fetcher.session.run_at)
+                            for job in batch])
+                replayed += len(batch)
+        except Exception as e:
+            metrics.add_error(company, platform, e)
+            report_error(e, company)
+
+    # Boards whose state is committed must reach the delta, so the sink is flushed even when the run is
+    # interrupted or fails
+    try:
+        if args.replay:
+            platforms = {platform.casefold() for platform in args.platform} if args.platform else None
+            names = {name.casefold() for name in args.name} if args.name else None
+            archived_runs = archive.runs(args.replay_since, args.replay_until)
+            for archived_run in archived_runs:
+                replay_session = ReplaySession(archive, archived_run)
+                data_fetchers = []
+                for feed, company, platform, source_type in archive.boards(archived_run):
+                    if platforms is not None and (platform or '').casefold() not in platforms:
+                        continue
+                    if names is not None and (company or '').casefold() not in names:
+                        continue
+                    data_fetchers.append(DataFetcher.create([feed], source_type, company, platform, replay_session))
+                engine.run(data_fetchers, collect_replayed)
+            print(f"REPLAY: {replayed} postings from {len(archived_runs)} archived runs")
+        elif args.schedule:
+            # Runs until interrupted, the intervals are kept next to the job state for the next start
+            scheduler = Scheduler(args.state_path, args.min_interval, args.max_interval, host_delay=args.host_delay)
+            for feed in boards:
+                scheduler.add(feed)
+            try:
+                scheduler.run(run_boards)
+            except KeyboardInterrupt:
+                print("Scheduler stopped")
+            finally:
+                scheduler.close()
+        elif args.queue is not None:
+            # Workers claim small batches, their own shard first, until no board is pending anywhere
+            work_queue = WorkQueue(args.queue)
+            work_queue.fill(boards, shard_count, new_epoch=args.queue_reset)
+            worker = f'{socket.gethostname()}-{os.getpid()}'
+            try:
+                while feeds := work_queue.claim(worker, shard_index, args.claim_size):
+                    # Boards another worker's registry added are not known here and count as failed
+                    done = run_boards([feed for feed in feeds if feed in boards])
+                    work_queue.finish(feeds, failed={feed for feed in feeds if feed not in done})
+                print(f"QUEUE: {work_queue.counts()}")
+            finally:
+                work_queue.close()
+        else:
+            feeds = list(shard_boards(boards, shard_index, shard_count)) if args.shard is not None else list(boards)
+            if journal is not None:
+                done = journal.completed()
+                feeds = [feed for feed in feeds if feed not in done]
+            run_boards(feeds)
+
+            # The run was not interrupted, the board files of this and earlier attempts become the delta. Boards
+            # that failed are not in the journal and are left to the next run as usual
+            if journal is not None:
+                for batch in batched(journal.iter_rows(), args.batch_size):
+                    rows = list(batch)
+                    sink.write(rows)
+                    if search_index is not None:
+                        search_index.update(rows)
+                journal.finish()
+    finally:
+        with metrics.run_timer('sink_close'):
+            sink.close()
+
+    if extraction_stage is not None:
+        extraction_stage.close()
+    session.close()
+    cache.close()
+    if archive is not None:
+        if not args.replay:
+            print(f"ARCHIVE: {archive.stored} payloads stored, {archive.reused} unchanged")
+        archive.close()
+    if enricher is not None:
+        enricher.cache.close()
+        print(f"ENRICH: {enricher.fetched} descriptions fetched, {enricher.cache.hits} from cache, {enricher.failed} without")
+    print(f"HTTP: {session.stats.as_dict()}, not modified: {cache.hits}")
+
+    print(f"DELTA: {delta.added} added, {delta.updated} updated, {delta.removed} removed")
+    if dedup is not None:
+        print(f"DEDUP: {dedup.duplicates} duplicate postings left out")
+
+    print(metrics.summary(args.slowest))
+    if args.metrics_jsonl is not None:
+        metrics.write_jsonl(args.metrics_jsonl)
+    if args.metrics_prom is not None:
+        metrics.write_prometheus(args.metrics_prom)
 
+    if search_index is not None:
+        search_index.close()
 
+    if args.full_export:
+        jobs_frame = to_frame(state.iter_jobs())
+        jobs_frame.to_excel('jobs_list.xlsx', index=False)
+    state.close()
 
-# flatten the list of dictionaries jobs_list
-jobs_list = [job for jobs in jobs_list for job in jobs]
 
-jobs_frame = (pd.DataFrame(jobs_list))
-jobs_frame.to_excel('jobs_list.xlsx', index=False)
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+STAGES = ['connect', 'download', 'parse', 'extract', 'enrich', 'write']
+
+
+class BoardMetrics:
+    def __init__(self, company: str, platform: str) -> None:
+        self.company = company
+        self.platform = platform
+        self.stages = {}
+        self.bytes = 0
+        self.jobs = 0
+        self.error = None
+
+    @property
+    def total(self) -> float:
+        return sum(self.stages.values())
+
+    def as_dict(self) -> dict:
+        return {
+            'company': self.company,
+            'platform': self.platform,
+            'stages': self.stages,
+            'total': self.total,
+            'bytes': self.bytes,
+            'jobs': self.jobs,
+            'error': self.error
+        }
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.boards = {}
+        # Stages that belong to the whole run rather than to one board, e.g. closing the sink
+        self.run_stages = {}
+
+    def board(self, company: str, platform: str) -> BoardMetrics:
+        with self.lock:
+            key = (company, platform.lower())
+            if key not in self.boards:
+                self.boards[key] = BoardMetrics(company, platform.lower())
+            return self.boards[key]
+
+    def add_time(self, company: str, platform: str, stage: str, seconds: float) -> None:
+        board = self.board(company, platform)
+        with self.lock:
+            board.stages[stage] = board.stages.get(stage, 0) + seconds
+
+    def add_fetch(self, data_fetcher) -> None:
+        # Fetchers keep their own timings, they are collected here once the board is downloaded
+        for stage, seconds in data_fetcher.timings.items():
+            self.add_time(data_fetcher.company_name, data_fetcher.ats_platform, stage, seconds)
+        board = self.board(data_fetcher.company_name, data_fetcher.ats_platform)
+        with self.lock:
+            board.bytes += data_fetcher.bytes_received
+
+    def add_jobs(self, company: str, platform: str, jobs: int) -> None:
+        board = self.board(company, platform)
+        with self.lock:
+            board.jobs += jobs
+
+    def add_error(self, company: str, platform: str, error: Exception) -> None:
+        board = self.board(company, platform)
+        with self.lock:
+            board.error = f'{type(error).__name__}: {error}'
+
+    @contextmanager
+    def timer(self, company: str, platform: str, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(company, platform, stage, time.perf_counter() - start)
+
+    @contextmanager
+    def run_timer(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.run_stages[stage] = self.run_stages.get(stage, 0) + time.perf_counter() - start
+
+    def timed_iter(self, iterable, company: str, platform: str, stage: str, count_jobs: bool = False):
+        # Only the time spent producing items counts, not the time the consumer holds them
+        iterator = iter(iterable)
+        count = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add_time(company, platform, stage, time.perf_counter() - start)
+                break
+            self.add_time(company, platform, stage, time.perf_counter() - start)
+            count += 1
+            yield item
+
+        if count_jobs:
+            self.add_jobs(company, platform, count)
+
+    def platforms(self) -> dict:
+        platforms = {}
+        for board in self.boards.values():
+            platform = platforms.setdefault(board.platform, {'boards': 0, 'errors': 0, 'jobs': 0, 'bytes': 0, 'stages': {}})
+            platform['boards'] += 1
+            platform['errors'] += board.error is not None
+            platform['jobs'] += board.jobs
+            platform['bytes'] += board.bytes
+            for stage, seconds in board.stages.items():
+                platform['stages'][stage] = platform['stages'].get(stage, 0) + seconds
+        return platforms
+
+    def write_jsonl(self, path: str) -> None:
+        with open(path, 'a', encoding='utf-8') as file:
+            for board in self.boards.values():
+                file.write(json.dumps(dict(board.as_dict(), timestamp=time.time())) + '\n')
+            file.write(json.dumps({'run_stages': self.run_stages, 'timestamp': time.time()}) + '\n')
+
+    def prometheus(self) -> str:
+        lines = [
+            '# HELP jobscrape_stage_seconds Seconds spent per board and stage in the last run',
+            '# TYPE jobscrape_stage_seconds gauge'
+        ]
+        for board in self.boards.values():
+            for stage, seconds in board.stages.items():
+                lines.append(f'jobscrape_stage_seconds{{{labels(board, stage=stage)}}} {seconds:.6f}')
+
+        for name, attribute, description in (('bytes', 'bytes', 'Bytes downloaded per board'),
+                                              ('jobs', 'jobs', 'Jobs extracted per board')):
+            lines.append(f'# HELP jobscrape_{name} {description}')
+            lines.append(f'# TYPE jobscrape_{name} gauge')
+            for board in self.boards.values():
+                lines.append(f'jobscrape_{name}{{{labels(board)}}} {getattr(board, attribute)}')
+
+        lines.append('# HELP jobscrape_run_stage_seconds Seconds spent in run level stages')
+        lines.append('# TYPE jobscrape_run_stage_seconds gauge')
+        for stage, seconds in self.run_stages.items():
+            lines.append(f'jobscrape_run_stage_seconds{{stage="{escape(stage)}"}} {seconds:.6f}')
+
+        lines.append('# HELP jobscrape_platform_errors Failed boards per platform')
+        lines.append('# TYPE jobscrape_platform_errors gauge')
+        for platform, totals in self.platforms().items():
+            lines.append(f'jobscrape_platform_errors{{platform="{escape(platform)}"}} {totals["errors"]}')
+
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(self.prometheus())
+
+    def summary(self, slowest: int = 10) -> str:
+        header = f"{'board':<28}{'platform':<16}" + ''.join(f'{stage:>10}' for stage in STAGES) + f"{'total':>10}{'KB':>10}{'jobs':>7}  error"
+        lines = [f'Slowest {slowest} boards (seconds)', header]
+
+        boards = sorted(self.boards.values(), key=lambda board: board.total, reverse=True)
+        for board in boards[:slowest]:
+            lines.append(f'{board.company[:27]:<28}{board.platform[:15]:<16}'
+                         + ''.join(f'{board.stages.get(stage, 0):>10.3f}' for stage in STAGES)
+                         + f'{board.total:>10.3f}{board.bytes / 1024:>10.1f}{board.jobs:>7}  {board.error or ""}')
+
+        lines.append('')
+        lines.append(f"{'platform':<16}{'boards':>8}{'errors':>8}{'jobs':>8}" + ''.join(f'{stage:>10}' for stage in STAGES))
+        for platform, totals in sorted(self.platforms().items()):
+            lines.append(f"{platform:<16}{totals['boards']:>8}{totals['errors']:>8}{totals['jobs']:>8}"
+                         + ''.join(f"{totals['stages'].get(stage, 0):>10.3f}" for stage in STAGES))
+
+        if self.run_stages:
+            lines.append('')
+            lines.append('Run: ' + ', '.join(f'{stage} {seconds:.3f}s' for stage, seconds in self.run_stages.items()))
+
+        return '\n'.join(lines)
+
+
+def escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def labels(board: BoardMetrics, **extra) -> str:
+    values = dict(company=board.company, platform=board.platform, **extra)
+    return ','.join(f'{key}="{escape(value)}"' for key, value in values.items())
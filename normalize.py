@@ -0,0 +1,85 @@
+import json
+import os
+import threading
+import time
+
+MAPPINGS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mappings.txt')
+
+# Fields that keep their value when it is not in the mappings, employment type falls back to None
+PASSTHROUGH_FIELDS = ['location', 'department']
+
+
+def normalize_key(value) -> str:
+    return ' '.join(str(value).split()).casefold()
+
+
+class Normalizer:
+    shared_normalizer = None
+    shared_lock = threading.Lock()
+
+    def __init__(self, path: str = MAPPINGS_PATH, check_interval: float = 5.0) -> None:
+        self.path = path
+        self.check_interval = check_interval
+        self.checked_at = 0.0
+        self.mtime = None
+        self.tables = {}
+        self.memo = {}
+        self.load()
+
+    @classmethod
+    def shared(cls) -> 'Normalizer':
+        # One table per process, loaded on first use and reloaded when mappings.txt changes
+        if cls.shared_normalizer is None:
+            with cls.shared_lock:
+                if cls.shared_normalizer is None:
+                    cls.shared_normalizer = cls()
+        cls.shared_normalizer.reload_if_changed()
+        return cls.shared_normalizer
+
+    def load(self) -> None:
+        self.mtime = os.path.getmtime(self.path)
+        with open(self.path, 'r', encoding='utf-8') as file:
+            mappings = json.load(file)
+
+        # Keys are compared case and whitespace insensitive, so they are folded once here
+        tables = {field: {normalize_key(key): value for key, value in values.items()}
+                  for field, values in mappings.items()}
+
+        self.tables = tables
+        self.memo = {field: {} for field in tables}
+
+    def reload_if_changed(self) -> None:
+        now = time.monotonic()
+        if now - self.checked_at < self.check_interval:
+            return
+        self.checked_at = now
+
+        try:
+            if os.path.getmtime(self.path) != self.mtime:
+                self.load()
+        except OSError:
+            pass
+
+    def normalize(self, field: str, value):
+        if value is None or not isinstance(value, str):
+            return value if field in PASSTHROUGH_FIELDS else None
+
+        memo = self.memo.get(field)
+        if memo is None:
+            return value if field in PASSTHROUGH_FIELDS else None
+        if value in memo:
+            return memo[value]
+
+        default = value if field in PASSTHROUGH_FIELDS else None
+        result = self.tables[field].get(normalize_key(value), default)
+        memo[value] = result
+        return result
+
+    def employment_type(self, value):
+        return self.normalize('employment_type', value)
+
+    def location(self, value):
+        return self.normalize('location', value)
+
+    def department(self, value):
+        return self.normalize('department', value)
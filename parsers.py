@@ -0,0 +1,106 @@
+import io
+import json
+from xml.etree import ElementTree as ET
+
+from bs4 import BeautifulSoup
+
+# Optional fast backends, every parse function falls back to the standard library when they are missing
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# The extractors walk BeautifulSoup trees, so for HTML the backend is the tree builder BeautifulSoup uses
+HTML_BACKENDS = ['lxml', 'html.parser']
+XML_BACKENDS = ['lxml', 'etree']
+JSON_BACKENDS = ['orjson', 'json']
+
+backends = {
+    'html': 'auto',
+    'xml': 'auto',
+    'json': 'auto'
+}
+
+
+def select_backends(html: str = None, xml: str = None, json: str = None) -> None:
+    for kind, backend in (('html', html), ('xml', xml), ('json', json)):
+        if backend is not None:
+            backends[kind] = backend
+
+
+def available(backend: str) -> bool:
+    if backend == 'lxml':
+        return lxml_etree is not None
+    elif backend == 'orjson':
+        return orjson is not None
+    return True
+
+
+def resolve(kind: str, backend: str = None) -> str:
+    backend = backend or backends[kind]
+    candidates = {'html': HTML_BACKENDS, 'xml': XML_BACKENDS, 'json': JSON_BACKENDS}[kind]
+
+    if backend == 'auto':
+        return next(candidate for candidate in candidates if available(candidate))
+    if backend not in candidates:
+        raise ValueError(f'Invalid {kind} parser backend')
+    # A backend that is not installed quietly falls back to the standard library one
+    return backend if available(backend) else candidates[-1]
+
+
+def parse_html(content, backend: str = None) -> BeautifulSoup:
+    return BeautifulSoup(content, resolve('html', backend))
+
+
+def parse_xml(content, backend: str = None):
+    if resolve('xml', backend) == 'lxml':
+        try:
+            return lxml_etree.fromstring(content)
+        except lxml_etree.XMLSyntaxError:
+            raise ValueError('Invalid XML data')
+
+    try:
+        return ET.fromstring(content)
+    except ET.ParseError:
+        raise ValueError('Invalid XML data')
+
+
+def iter_xml(content, tag: str, backend: str = None):
+    # Yields every <tag> element as soon as it is complete and clears it afterwards,
+    # so only one element is ever held instead of the whole tree
+    source = io.BytesIO(content) if isinstance(content, (bytes, bytearray)) else content
+
+    if resolve('xml', backend) == 'lxml':
+        try:
+            for _, element in lxml_etree.iterparse(source, events=('end',), tag=tag):
+                yield element
+                element.clear()
+                # Cleared elements stay attached to the root, drop the ones before this one
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+        except lxml_etree.XMLSyntaxError:
+            raise ValueError('Invalid XML data')
+        return
+
+    root = None
+    try:
+        for event, element in ET.iterparse(source, events=('start', 'end')):
+            if root is None:
+                root = element
+            if event == 'end' and element.tag == tag:
+                yield element
+                element.clear()
+                root.clear()
+    except ET.ParseError:
+        raise ValueError('Invalid XML data')
+
+
+def parse_json(content, backend: str = None):
+    if resolve('json', backend) == 'orjson':
+        return orjson.loads(content)
+    return json.loads(content)
@@ -0,0 +1,65 @@
+import sys
+from operator import attrgetter
+
+FIELDS = ('company', 'id', 'title', 'url', 'departments', 'location', 'employment_type', 'description', 'published_on')
+
+
+def intern(value):
+    # Company, location and employment type repeat on thousands of postings, interning keeps one copy of each
+    return sys.intern(value) if type(value) is str else value
+
+
+class JobRecord:
+    __slots__ = FIELDS
+
+    def __init__(self, company=None, id=None, title=None, url=None, departments=None, location=None,
+                 employment_type=None, description=None, published_on=None) -> None:
+        self.company = intern(company)
+        self.id = id
+        self.title = title
+        self.url = url
+        self.departments = departments
+        self.location = intern(location)
+        self.employment_type = intern(employment_type)
+        self.description = description
+        self.published_on = published_on
+
+    # Read access like a dict, so dict(job, ...) and job['id'] keep working for the consumers
+    def __getitem__(self, key: str):
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def keys(self) -> tuple:
+        return FIELDS
+
+    def values(self) -> tuple:
+        return tuple(getattr(self, field) for field in FIELDS)
+
+    def as_dict(self) -> dict:
+        return {field: getattr(self, field) for field in FIELDS}
+
+    def __reduce__(self):
+        # Rebuilding through __init__ interns the strings again after crossing a process boundary
+        return JobRecord, self.values()
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, JobRecord) and self.values() == other.values()
+
+    def __repr__(self) -> str:
+        return f'JobRecord(company={self.company!r}, id={self.id!r}, title={self.title!r})'
+
+
+def records_to_columns(records) -> dict:
+    # Column batches for pandas, built without an intermediate dict per posting
+    rows = list(map(attrgetter(*FIELDS), records))
+    if not rows:
+        return {field: [] for field in FIELDS}
+    return dict(zip(FIELDS, map(list, zip(*rows))))
+
+
+def to_frame(records):
+    import pandas as pd
+
+    return pd.DataFrame(records_to_columns(records), columns=list(FIELDS))
+
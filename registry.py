@@ -0,0 +1,110 @@
+import json
+import os
+
+REGISTRY_PATH = 'JobBoards.xlsx'
+
+# Column headers of the sheet, in the order a Board takes them
+COLUMNS = ('Name', 'Website', 'Job Board', 'Platform', 'Job Feed', 'Source', 'Implemented')
+
+
+class Board:
+    __slots__ = ('name', 'website', 'job_board', 'platform', 'feed', 'source', 'implemented')
+
+    def __init__(self, name=None, website=None, job_board=None, platform=None, feed=None, source=None,
+                 implemented=None) -> None:
+        self.name = name
+        self.website = website
+        self.job_board = job_board
+        self.platform = platform
+        self.feed = feed
+        self.source = source
+        self.implemented = implemented
+
+    def values(self) -> list:
+        return [getattr(self, field) for field in self.__slots__]
+
+    def __repr__(self) -> str:
+        return f'Board(name={self.name!r}, platform={self.platform!r}, feed={self.feed!r})'
+
+
+def cell(value):
+    # Empty cells and whitespace count as missing, like NaN did in the spreadsheet frame
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def read_workbook(path: str) -> list:
+    # openpyxl is only needed when the sheet changed since the cache was compiled
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [cell(value) for value in next(rows, [])]
+        missing = [column for column in COLUMNS if column not in header]
+        if missing:
+            raise ValueError(f"Missing registry columns {', '.join(missing)}")
+
+        indexes = [header.index(column) for column in COLUMNS]
+        boards = []
+        for row in rows:
+            values = [cell(row[index]) if index < len(row) else None for index in indexes]
+            if any(values):
+                boards.append(Board(*values))
+        return boards
+    finally:
+        workbook.close()
+
+
+class Registry:
+    def __init__(self, path: str = REGISTRY_PATH, cache_path: str = None) -> None:
+        self.path = path
+        # The compiled cache sits next to the sheet, e.g. JobBoards.registry.json
+        self.cache_path = cache_path or os.path.splitext(path)[0] + '.registry.json'
+        self.boards = self.load()
+
+    def load(self) -> list:
+        stat = os.stat(self.path)
+        signature = [stat.st_mtime_ns, stat.st_size]
+
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as file:
+                cache = json.load(file)
+            if cache.get('signature') == signature:
+                return [Board(*values) for values in cache['boards']]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        boards = read_workbook(self.path)
+        self.save(signature, boards)
+        return boards
+
+    def save(self, signature: list, boards: list) -> None:
+        # Written next to the cache and renamed, so a concurrent run never reads half a file
+        temporary_path = f'{self.cache_path}.{os.getpid()}.tmp'
+        try:
+            with open(temporary_path, 'w', encoding='utf-8') as file:
+                json.dump({'signature': signature, 'boards': [board.values() for board in boards]}, file)
+            os.replace(temporary_path, self.cache_path)
+        except OSError:
+            # A read-only checkout still works, it just compiles the sheet on every start
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+    def filter(self, platforms: list = None, names: list = None, implemented_only: bool = True) -> list:
+        # Platform and name match case-insensitively
+        platforms = {platform.casefold() for platform in platforms} if platforms else None
+        names = {name.casefold() for name in names} if names else None
+
+        boards = []
+        for board in self.boards:
+            if implemented_only and board.implemented is None:
+                continue
+            if platforms is not None and (board.platform or '').casefold() not in platforms:
+                continue
+            if names is not None and (board.name or '').casefold() not in names:
+                continue
+            boards.append(board)
+        return boards
@@ -0,0 +1,121 @@
+import email.utils
+import random
+import threading
+import time
+
+# Statuses that are worth another attempt, everything else is the board's final answer
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        # Blocks until a token is free and returns the seconds waited
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+class HostRateLimiter:
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, host: str) -> float:
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.rate, self.burst)
+            bucket = self.buckets[host]
+        return bucket.acquire()
+
+
+def retry_after(response) -> float:
+    # Retry-After is either seconds or an HTTP date
+    value = response.headers.get('Retry-After') if response is not None else None
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(email.utils.parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    def __init__(self, retries: int = 3, backoff: float = 0.5, max_backoff: float = 30.0) -> None:
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def should_retry(self, attempt: int, response=None) -> bool:
+        if attempt >= self.retries:
+            return False
+        if response is None:
+            return True
+        # A server that asks for a longer pause than max_backoff gets it, the answer goes to the caller instead of
+        # a retry that comes too early or a worker that sleeps through the run
+        server_delay = retry_after(response)
+        if server_delay is not None and server_delay > self.max_backoff:
+            return False
+        return response.status_code in RETRY_STATUSES
+
+    def delay(self, attempt: int, response=None) -> float:
+        # The server's Retry-After wins, should_retry keeps it within max_backoff; otherwise exponential backoff
+        # with full jitter
+        server_delay = retry_after(response)
+        if server_delay is not None:
+            return server_delay
+        return random.uniform(0, min(self.backoff * 2 ** attempt, self.max_backoff))
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int = 3, cooldown: float = 300.0) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = {}
+        self.opened_at = {}
+        self.lock = threading.Lock()
+
+    def allow(self, key: str) -> bool:
+        # After the cooldown one attempt goes through, its result closes or reopens the circuit
+        with self.lock:
+            opened_at = self.opened_at.get(key)
+            if opened_at is None:
+                return True
+            if time.monotonic() - opened_at >= self.cooldown:
+                self.opened_at[key] = time.monotonic()
+                return True
+            return False
+
+    def success(self, key: str) -> None:
+        with self.lock:
+            self.failures.pop(key, None)
+            self.opened_at.pop(key, None)
+
+    def failure(self, key: str) -> None:
+        with self.lock:
+            self.failures[key] = self.failures.get(key, 0) + 1
+            if self.failures[key] >= self.threshold:
+                self.opened_at[key] = time.monotonic()
+
+    def open_circuits(self) -> list:
+        with self.lock:
+            return list(self.opened_at)
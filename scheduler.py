@@ -0,0 +1,104 @@
+import heapq
+import random
+import sqlite3
+import time
+from urllib.parse import urlparse
+
+
+class Scheduler:
+    def __init__(self, path: str = 'jobs_state.sqlite', min_interval: float = 15 * 60, max_interval: float = 24 * 60 * 60,
+                 initial_interval: float = 60 * 60, jitter: float = 0.1, host_delay: float = 2.0) -> None:
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.initial_interval = initial_interval
+        self.jitter = jitter
+        # Minimum spacing between two boards on the same host, so a host is never hit in a burst
+        self.host_delay = host_delay
+
+        self.queue = []
+        self.intervals = {}
+        self.hosts = {}
+        self.host_next_allowed = {}
+        self.counter = 0
+
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS schedule (
+                feed TEXT PRIMARY KEY,
+                interval REAL,
+                next_due REAL
+            )
+        """)
+        self.connection.commit()
+
+    def add(self, feed: str) -> None:
+        row = self.connection.execute('SELECT interval, next_due FROM schedule WHERE feed = ?', (feed,)).fetchone()
+        interval, next_due = row if row is not None else (self.initial_interval, time.time())
+
+        self.intervals[feed] = interval
+        self.hosts[feed] = urlparse(feed).netloc
+        self.push(feed, next_due)
+
+    def push(self, feed: str, due: float) -> None:
+        # The counter keeps the heap from ever comparing two feeds with the same due time
+        self.counter += 1
+        heapq.heappush(self.queue, (due, self.counter, feed))
+
+    def pop_due(self, now: float = None) -> list:
+        now = now if now is not None else time.time()
+        due = []
+        deferred = []
+
+        while self.queue and self.queue[0][0] <= now:
+            _, _, feed = heapq.heappop(self.queue)
+            host = self.hosts[feed]
+
+            # A host that was just used pushes its next board back instead of fetching it in the same burst
+            next_allowed = self.host_next_allowed.get(host, 0)
+            if next_allowed > now:
+                deferred.append((feed, next_allowed))
+                continue
+
+            self.host_next_allowed[host] = now + self.host_delay
+            due.append(feed)
+
+        for feed, next_allowed in deferred:
+            self.push(feed, next_allowed)
+
+        return due
+
+    def record(self, feed: str, changed: bool, now: float = None) -> None:
+        # Boards that changed are checked twice as often, static or failing ones back off towards max_interval
+        now = now if now is not None else time.time()
+        interval = self.intervals.get(feed, self.initial_interval)
+        interval = interval / 2 if changed else interval * 1.5
+        interval = min(max(interval, self.min_interval), self.max_interval)
+        self.intervals[feed] = interval
+
+        next_due = now + interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+        self.push(feed, next_due)
+
+        self.connection.execute('INSERT OR REPLACE INTO schedule VALUES (?, ?, ?)', (feed, interval, next_due))
+        self.connection.commit()
+
+    def wait_time(self, now: float = None) -> float:
+        now = now if now is not None else time.time()
+        if not self.queue:
+            return self.max_interval
+        return max(self.queue[0][0] - now, 0)
+
+    def run(self, run_boards, max_sleep: float = 60) -> None:
+        # run_boards(feeds) fetches the given boards and returns {feed: changed}, boards missing in it count as unchanged
+        while True:
+            due = self.pop_due()
+            if not due:
+                time.sleep(min(self.wait_time(), max_sleep))
+                continue
+
+            changed = run_boards(due)
+            now = time.time()
+            for feed in due:
+                self.record(feed, changed.get(feed, False), now)
+
+    def close(self) -> None:
+        self.connection.close()
@@ -0,0 +1,213 @@
+import argparse
+import json
+import sqlite3
+
+from normalize import normalize_key
+
+FACETS = ['company', 'location', 'departments', 'employment_type', 'platform']
+COLUMNS = ['company', 'id', 'title', 'url', 'departments', 'location', 'employment_type', 'description',
+           'published_on', 'platform']
+
+
+def stored_value(value):
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=str)
+    return value
+
+
+def facet_values(value) -> list:
+    # Greenhouse gives departments as a list of objects, the other platforms as a plain string
+    if value is None:
+        return []
+    if isinstance(value, list):
+        values = []
+        for item in value:
+            values.extend(facet_values(item.get('name') if isinstance(item, dict) else item))
+        return values
+    value = normalize_key(value)
+    return [value] if value else []
+
+
+def match_query(text: str) -> str:
+    # Every word has to occur, quoted so user input never hits the FTS5 query syntax
+    return ' '.join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+class SearchIndex:
+    def __init__(self, path: str = 'jobs_search.sqlite') -> None:
+        # Updated from the engine's consumer thread
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS postings (
+                rowid INTEGER PRIMARY KEY,
+                company TEXT,
+                id TEXT,
+                title TEXT,
+                url TEXT,
+                departments TEXT,
+                location TEXT,
+                employment_type TEXT,
+                description TEXT,
+                published_on TEXT,
+                platform TEXT,
+                UNIQUE (company, id)
+            );
+
+            -- Inverted index over title and description, kept in sync with postings by the triggers
+            CREATE VIRTUAL TABLE IF NOT EXISTS postings_fts USING fts5(
+                title, description, content='postings', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2'
+            );
+            CREATE TRIGGER IF NOT EXISTS postings_insert AFTER INSERT ON postings BEGIN
+                INSERT INTO postings_fts (rowid, title, description) VALUES (new.rowid, new.title, new.description);
+            END;
+            CREATE TRIGGER IF NOT EXISTS postings_delete AFTER DELETE ON postings BEGIN
+                INSERT INTO postings_fts (postings_fts, rowid, title, description)
+                VALUES ('delete', old.rowid, old.title, old.description);
+            END;
+
+            -- One row per posting and facet value, so a facet filter is a range scan on the primary key
+            CREATE TABLE IF NOT EXISTS facets (
+                field TEXT,
+                value TEXT,
+                posting INTEGER,
+                PRIMARY KEY (field, value, posting)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS facets_posting ON facets (posting);
+            CREATE INDEX IF NOT EXISTS postings_published_on ON postings (published_on);
+        """)
+        self.connection.commit()
+
+    def update(self, rows) -> None:
+        # rows are the delta rows of a run: postings with their platform and change
+        for row in rows:
+            self.delete(row['company'], row['id'])
+            if row.get('change') != 'removed':
+                self.insert(row)
+        self.connection.commit()
+
+    def rebuild(self, rows) -> None:
+        # Starts over from the full state, e.g. for the first run with an index. Rows stored before the state
+        # kept the platform have none and are left out of the platform facet
+        self.connection.executescript('DELETE FROM postings; DELETE FROM facets;')
+        for row in rows:
+            self.insert(row)
+        self.connection.commit()
+
+    def insert(self, row) -> None:
+        values = [stored_value(row.get(column)) for column in COLUMNS]
+        values[1] = str(values[1])
+        posting = self.connection.execute(
+            f"INSERT INTO postings ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})", values).lastrowid
+        self.connection.executemany('INSERT OR IGNORE INTO facets VALUES (?, ?, ?)',
+                                    ((field, value, posting) for field in FACETS for value in facet_values(row.get(field))))
+
+    def delete(self, company: str, job_id) -> None:
+        row = self.connection.execute('SELECT rowid FROM postings WHERE company = ? AND id = ?',
+                                      (company, str(job_id))).fetchone()
+        if row is None:
+            return
+        self.connection.execute('DELETE FROM facets WHERE posting = ?', row)
+        self.connection.execute('DELETE FROM postings WHERE rowid = ?', row)
+
+    def facet_filters(self, facets: dict) -> list:
+        filters = []
+        for field, values in facets.items():
+            if field not in FACETS:
+                raise ValueError(f'Invalid facet {field}')
+            if values is None:
+                continue
+            values = [values] if isinstance(values, str) else list(values)
+            filters.append((field, [normalize_key(value) for value in values]))
+        return filters
+
+    def matching(self, text: str = None, facets: dict = None) -> tuple:
+        # Source, posting rowid expression and WHERE of the matching postings. The most selective part drives
+        # the query, the remaining facets are point lookups on the facet primary key
+        filters = self.facet_filters(facets or {})
+        clauses, parameters = [], []
+
+        if text:
+            source, posting = 'postings_fts', 'postings_fts.rowid'
+            clauses.append('postings_fts MATCH ?')
+            parameters.append(match_query(text))
+        elif filters:
+            filters.sort(key=lambda facet: self.facet_size(*facet))
+            field, values = filters.pop(0)
+            source, posting = 'facets AS driver', 'driver.posting'
+            clauses.append(f"driver.field = ? AND driver.value IN ({', '.join('?' * len(values))})")
+            parameters.extend([field] + values)
+        else:
+            source, posting = 'postings', 'postings.rowid'
+
+        for field, values in filters:
+            clauses.append(f"EXISTS (SELECT 1 FROM facets WHERE field = ? AND value IN ({', '.join('?' * len(values))}) "
+                           f"AND posting = {posting})")
+            parameters.extend([field] + values)
+
+        return source, posting, ' AND '.join(clauses) or '1', parameters
+
+    def facet_size(self, field: str, values: list, cap: int = 5000) -> int:
+        # Only needs to rank the facets against each other, so counting stops at cap
+        return self.connection.execute(
+            f"SELECT COUNT(*) FROM (SELECT 1 FROM facets WHERE field = ? AND value IN ({', '.join('?' * len(values))}) "
+            f"LIMIT ?)", [field] + values + [cap]).fetchone()[0]
+
+    def search(self, text: str = None, limit: int = 20, offset: int = 0, **facets) -> list:
+        # e.g. search('backend', location='Berlin', employment_type='Full Time'), best matches first
+        source, posting, where, parameters = self.matching(text, facets)
+        if source != 'postings':
+            source += f' CROSS JOIN postings ON postings.rowid = {posting}'
+        order = 'bm25(postings_fts, 10.0, 1.0)' if text else 'postings.published_on DESC'
+        rows = self.connection.execute(
+            f"SELECT {', '.join(f'postings.{column}' for column in COLUMNS)} FROM {source} WHERE {where} "
+            f"ORDER BY {order} LIMIT ? OFFSET ?", parameters + [limit, offset]).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def count(self, text: str = None, **facets) -> int:
+        source, _, where, parameters = self.matching(text, facets)
+        return self.connection.execute(f'SELECT COUNT(*) FROM {source} WHERE {where}', parameters).fetchone()[0]
+
+    def facet_counts(self, field: str, text: str = None, limit: int = 20, **facets) -> list:
+        # Values of one facet with their number of matching postings, for drill-down; CROSS JOIN keeps
+        # SQLite from scanning the whole facet table first
+        if field not in FACETS:
+            raise ValueError(f'Invalid facet {field}')
+        source, posting, where, parameters = self.matching(text, facets)
+        return self.connection.execute(f"""
+            SELECT counted.value, COUNT(*) AS postings FROM {source}
+            CROSS JOIN facets AS counted ON counted.posting = {posting} AND counted.field = ?
+            WHERE {where} GROUP BY counted.value ORDER BY postings DESC, counted.value LIMIT ?
+        """, [field] + parameters + [limit]).fetchall()
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Query the search index of the scraped postings')
+    parser.add_argument('text', nargs='?', default=None, help='words that must occur in title or description')
+    parser.add_argument('--index', default='jobs_search.sqlite')
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--facet', default=None, choices=FACETS, help='show the value counts of this facet')
+    parser.add_argument('--rebuild', default=None, metavar='STATE_PATH', help='index every posting of this state store')
+    for facet in FACETS:
+        parser.add_argument(f"--{facet.replace('_', '-')}", nargs='*', default=None)
+    args = parser.parse_args()
+
+    index = SearchIndex(args.index)
+    if args.rebuild is not None:
+        from state import StateStore
+
+        state = StateStore(args.rebuild)
+        index.rebuild(dict(job, platform=platform) for platform, job in state.iter_platform_jobs())
+        state.close()
+
+    filters = {facet: getattr(args, facet) for facet in FACETS}
+    if args.facet is not None:
+        for value, postings in index.facet_counts(args.facet, args.text, args.limit, **filters):
+            print(f'{postings:>8}  {value}')
+    else:
+        print(f'{index.count(args.text, **filters)} postings')
+        for row in index.search(args.text, args.limit, **filters):
+            print(f"{row['company']:<24}{(row['location'] or '')[:20]:<22}{row['title']}")
+    index.close()
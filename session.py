@@ -0,0 +1,144 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from resilience import HostRateLimiter, RetryPolicy
+
+# urllib3 only decodes brotli when one of the brotli packages is installed
+try:
+    import brotli
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    try:
+        import brotlicffi
+        ACCEPT_ENCODING = 'gzip, deflate, br'
+    except ImportError:
+        ACCEPT_ENCODING = 'gzip, deflate'
+
+
+class SessionStats:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.bytes_received = 0
+        self.bytes_decoded = 0
+        self.retries = 0
+        self.throttled_seconds = 0.0
+
+    @property
+    def connections_reused(self) -> int:
+        return max(self.requests - self.connections, 0)
+
+    def add_connection(self) -> None:
+        with self.lock:
+            self.connections += 1
+
+    def add_response(self, bytes_received: int, bytes_decoded: int) -> None:
+        with self.lock:
+            self.requests += 1
+            self.bytes_received += bytes_received
+            self.bytes_decoded += bytes_decoded
+
+    def add_retry(self) -> None:
+        with self.lock:
+            self.retries += 1
+
+    def add_throttle(self, seconds: float) -> None:
+        with self.lock:
+            self.throttled_seconds += seconds
+
+    def as_dict(self) -> dict:
+        return {
+            'requests': self.requests,
+            'connections': self.connections,
+            'connections_reused': self.connections_reused,
+            'bytes_received': self.bytes_received,
+            'bytes_decoded': self.bytes_decoded,
+            'retries': self.retries,
+            'throttled_seconds': round(self.throttled_seconds, 3)
+        }
+
+
+def counting_pool(pool_class, stats):
+    class CountingConnectionPool(pool_class):
+        def _new_conn(self):
+            stats.add_connection()
+            return super()._new_conn()
+
+    return CountingConnectionPool
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    def __init__(self, stats: SessionStats, **kwargs) -> None:
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': counting_pool(HTTPConnectionPool, self.stats),
+            'https': counting_pool(HTTPSConnectionPool, self.stats)
+        }
+
+
+class HttpSession:
+    shared_session = None
+
+    def __init__(self, pool_connections: int = 100, pool_maxsize: int = 4, connect_timeout: float = 5,
+                 read_timeout: float = 30, host_rate: float = None, host_burst: int = 1,
+                 retry_policy: RetryPolicy = None) -> None:
+        self.timeout = (connect_timeout, read_timeout)
+        self.stats = SessionStats()
+        # host_rate requests per second and host, None leaves the hosts unthrottled
+        self.rate_limiter = HostRateLimiter(host_rate, host_burst) if host_rate else None
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+
+        # One keep-alive pool per host, pool_maxsize connections each
+        adapter = CountingHTTPAdapter(self.stats, pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'Accept-Encoding': ACCEPT_ENCODING, 'Connection': 'keep-alive'})
+
+    @classmethod
+    def shared(cls) -> 'HttpSession':
+        if cls.shared_session is None:
+            cls.shared_session = cls()
+        return cls.shared_session
+
+    def get(self, url: str, headers: dict = None, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        host = urlparse(url).netloc
+
+        # 429, 5xx, timeouts and dropped connections are retried, the last answer or error goes to the caller
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.stats.add_throttle(self.rate_limiter.acquire(host))
+            try:
+                response = self.session.get(url, headers=headers, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if not self.retry_policy.should_retry(attempt):
+                    raise
+                response = None
+
+            if response is not None:
+                # Reading content releases the connection back to the pool; raw.tell() is the size on the wire
+                content = response.content
+                response.bytes_received = response.raw.tell()
+                self.stats.add_response(response.bytes_received, len(content))
+
+                if not self.retry_policy.should_retry(attempt, response):
+                    return response
+
+            time.sleep(self.retry_policy.delay(attempt, response))
+            self.stats.add_retry()
+            attempt += 1
+
+    def close(self) -> None:
+        self.session.close()
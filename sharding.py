@@ -0,0 +1,172 @@
+import bisect
+import csv
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+
+def ring_hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+
+class HashRing:
+    def __init__(self, nodes: list, replicas: int = 160) -> None:
+        # Every node sits on the ring many times, so the boards spread evenly and adding a node only moves 1/N of them
+        self.ring = sorted((ring_hash(f'{node}#{replica}'), node) for node in nodes for replica in range(replicas))
+        self.positions = [position for position, _ in self.ring]
+
+    def node(self, key: str):
+        index = bisect.bisect(self.positions, ring_hash(key)) % len(self.ring)
+        return self.ring[index][1]
+
+
+def parse_shard(value: str) -> tuple:
+    # '2/8' is the third of eight shards
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise ValueError('Invalid shard, expected index/count')
+    if count < 1 or not 0 <= index < count:
+        raise ValueError('Invalid shard, expected index/count')
+    return index, count
+
+
+def shard_boards(boards: dict, index: int, count: int) -> dict:
+    ring = HashRing(range(count))
+    return {feed: board for feed, board in boards.items() if ring.node(feed) == index}
+
+
+class WorkQueue:
+    def __init__(self, path: str = 'work_queue.sqlite', lease: float = 15 * 60) -> None:
+        # Claimed boards of a worker that died are handed out again once the lease is over
+        self.lease = lease
+        self.epoch = None
+        self.connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        # Every run of the queue is an epoch of its own, boards finished in an earlier one are fetched again
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS epochs (
+                epoch INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at REAL
+            )
+        """)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS epoch_boards (
+                epoch INTEGER,
+                feed TEXT,
+                shard INTEGER,
+                status TEXT,
+                worker TEXT,
+                claimed_at REAL,
+                finished_at REAL,
+                PRIMARY KEY (epoch, feed)
+            )
+        """)
+        self.connection.execute('CREATE INDEX IF NOT EXISTS epoch_boards_status ON epoch_boards (epoch, status, shard)')
+
+    def fill(self, feeds, count: int, new_epoch: bool = False) -> int:
+        # Workers that start while the last epoch still has open boards join it, otherwise the first of them
+        # starts a new one. new_epoch starts one either way, workers still in the old epoch finish it undisturbed
+        ring = HashRing(range(count))
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            epoch, = self.connection.execute('SELECT MAX(epoch) FROM epochs').fetchone()
+            if epoch is not None and not new_epoch:
+                open_board = self.connection.execute("""
+                    SELECT 1 FROM epoch_boards WHERE epoch = ? AND status IN ('pending', 'claimed') LIMIT 1
+                """, (epoch,)).fetchone()
+                if open_board is None:
+                    epoch = None
+            if epoch is None or new_epoch:
+                epoch = self.connection.execute('INSERT INTO epochs (started_at) VALUES (?)', (time.time(),)).lastrowid
+            self.connection.executemany("""
+                INSERT OR IGNORE INTO epoch_boards (epoch, feed, shard, status) VALUES (?, ?, ?, 'pending')
+            """, ((epoch, feed, ring.node(feed)) for feed in feeds))
+            self.connection.execute('COMMIT')
+        except Exception:
+            self.connection.execute('ROLLBACK')
+            raise
+        self.epoch = epoch
+        return epoch
+
+    def claim(self, worker: str, shard: int, limit: int = 16) -> list:
+        # The worker's own shard first, then it steals pending boards of the other shards
+        now = time.time()
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            self.connection.execute("""
+                UPDATE epoch_boards SET status = 'pending', worker = NULL
+                WHERE epoch = ? AND status = 'claimed' AND claimed_at < ?
+            """, (self.epoch, now - self.lease))
+            rows = self.connection.execute("""
+                SELECT feed FROM epoch_boards WHERE epoch = ? AND status = 'pending'
+                ORDER BY shard != ?, shard, feed LIMIT ?
+            """, (self.epoch, shard, limit)).fetchall()
+            feeds = [feed for feed, in rows]
+            self.connection.executemany("""
+                UPDATE epoch_boards SET status = 'claimed', worker = ?, claimed_at = ? WHERE epoch = ? AND feed = ?
+            """, ((worker, now, self.epoch, feed) for feed in feeds))
+            self.connection.execute('COMMIT')
+        except Exception:
+            self.connection.execute('ROLLBACK')
+            raise
+        return feeds
+
+    def finish(self, feeds: list, failed=()) -> None:
+        now = time.time()
+        self.connection.execute('BEGIN IMMEDIATE')
+        self.connection.executemany('UPDATE epoch_boards SET status = ?, finished_at = ? WHERE epoch = ? AND feed = ?',
+                                    (('failed' if feed in failed else 'done', now, self.epoch, feed) for feed in feeds))
+        self.connection.execute('COMMIT')
+
+    def counts(self) -> dict:
+        return dict(self.connection.execute(
+            'SELECT status, COUNT(*) FROM epoch_boards WHERE epoch = ? GROUP BY status', (self.epoch,)).fetchall())
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def partial_files(path: str) -> list:
+    # A partial output is a file or a partitioned directory of part files
+    if not os.path.isdir(path):
+        return [path]
+    files = []
+    for directory, _, names in os.walk(path):
+        files.extend(os.path.join(directory, name) for name in sorted(names))
+    return files
+
+
+def read_rows(path: str):
+    name = path[:-3] if path.endswith('.gz') else path
+    opener = gzip.open if path.endswith('.gz') else open
+
+    if name.endswith('.jsonl'):
+        with opener(path, 'rt', encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+    elif name.endswith('.csv'):
+        with opener(path, 'rt', encoding='utf-8', newline='') as file:
+            yield from csv.DictReader(file)
+    elif name.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        yield from pq.read_table(path).to_pylist()
+    else:
+        raise ValueError('Invalid partial output')
+
+
+def merge_rows(paths: list):
+    # Boards can be fetched by more than one worker, the row of the latest run wins per (company, id)
+    merged = {}
+    for path in paths:
+        for file_path in partial_files(path):
+            for row in read_rows(file_path):
+                key = (row.get('company'), str(row.get('id')))
+                current = merged.get(key)
+                if current is None or str(row.get('run_at') or '') >= str(current.get('run_at') or ''):
+                    merged[key] = row
+    return merged.values()
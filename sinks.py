@@ -0,0 +1,181 @@
+import csv
+import gzip
+import json
+import os
+import queue
+import threading
+
+
+def flat_value(value):
+    # Some platforms return departments and similar fields as lists or objects
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=str)
+    return value
+
+
+class Sink:
+    extension = ''
+
+    def __init__(self, path: str, partition_by: list = None, compression: str = None) -> None:
+        self.path = path
+        self.partition_by = partition_by or []
+        self.compression = compression
+
+    @classmethod
+    def create(cls, path, sink_type, partition_by=None, compression=None, **kwargs) -> 'Sink':
+        if sink_type == 'jsonl':
+            return JSONLinesSink(path, partition_by, compression)
+        elif sink_type == 'csv':
+            return CSVSink(path, partition_by, compression)
+        elif sink_type == 'parquet':
+            return ParquetSink(path, partition_by, compression, **kwargs)
+        elif sink_type == 'excel':
+            return ExcelSink(path)
+        else:
+            raise ValueError('Invalid sink type')
+
+    def write(self, rows: list) -> None:
+        if not self.partition_by:
+            self.write_partition(self.path, rows)
+            return
+
+        # One directory per partition value, e.g. jobs_delta/platform=lever/company=finn/
+        partitions = {}
+        for row in rows:
+            key = tuple(f"{field}={str(row.get(field)).replace('/', '_')}" for field in self.partition_by)
+            partitions.setdefault(key, []).append(row)
+
+        for key, partition_rows in partitions.items():
+            directory = os.path.join(self.path, *key)
+            os.makedirs(directory, exist_ok=True)
+            self.write_partition(os.path.join(directory, f'part{self.extension}'), partition_rows)
+
+    def write_partition(self, path: str, rows: list) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def open_append(self, path: str):
+        if self.compression == 'gzip':
+            # Appending adds a new gzip member, which every gzip reader concatenates
+            return gzip.open(path + '.gz', 'at', encoding='utf-8', newline='')
+        return open(path, 'a', encoding='utf-8', newline='')
+
+
+class JSONLinesSink(Sink):
+    extension = '.jsonl'
+
+    def write_partition(self, path, rows):
+        with self.open_append(path) as file:
+            file.writelines(json.dumps(row, default=str) + '\n' for row in rows)
+
+
+class CSVSink(Sink):
+    extension = '.csv'
+
+    def write_partition(self, path, rows):
+        file_path = path + '.gz' if self.compression == 'gzip' else path
+        write_header = not os.path.exists(file_path) or os.path.getsize(file_path) == 0
+
+        with self.open_append(path) as file:
+            writer = csv.DictWriter(file, fieldnames=list(rows[0].keys()), extrasaction='ignore')
+            if write_header:
+                writer.writeheader()
+            writer.writerows({key: flat_value(value) for key, value in row.items()} for row in rows)
+
+
+class ParquetSink(Sink):
+    extension = '.parquet'
+
+    def __init__(self, path, partition_by=None, compression=None, row_group_size: int = 10000) -> None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ValueError('The parquet sink needs pyarrow installed')
+        super().__init__(path, partition_by, compression or 'snappy')
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.row_group_size = row_group_size
+        self.buffers = {}
+        self.parts = 0
+
+    def write_partition(self, path, rows):
+        buffer = self.buffers.setdefault(path, [])
+        buffer.extend(rows)
+        if len(buffer) >= self.row_group_size:
+            self.flush(path)
+
+    def flush(self, path: str) -> None:
+        rows = self.buffers.pop(path, [])
+        if not rows:
+            return
+
+        # Every row group is its own part file, so a crash only loses the rows still buffered. Ids and dates are
+        # numbers on some platforms and strings on others, so every column is a string column and all part
+        # files share one schema
+        columns = list(rows[0].keys())
+        schema = self.pa.schema([(column, self.pa.string()) for column in columns])
+        table = self.pa.table({column: [None if row.get(column) is None else str(flat_value(row.get(column)))
+                                        for row in rows] for column in columns}, schema=schema)
+        directory = path if not self.partition_by else os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        self.parts += 1
+        part_path = os.path.join(directory, f'part-{os.getpid()}-{self.parts:05d}.parquet')
+        self.pq.write_table(table, part_path, compression=self.compression)
+
+    def close(self):
+        for path in list(self.buffers):
+            self.flush(path)
+
+
+class ExcelSink(Sink):
+    extension = '.xlsx'
+
+    def __init__(self, path) -> None:
+        super().__init__(path)
+        self.rows = []
+
+    def write_partition(self, path, rows):
+        self.rows.extend(rows)
+
+    def close(self):
+        # Excel cannot be appended to, so it is only written once at the end of the run
+        import pandas as pd
+
+        pd.DataFrame(self.rows).to_excel(self.path, index=False)
+
+
+class ThreadedSink:
+    def __init__(self, sink: Sink, max_batches: int = 8) -> None:
+        # Writing happens on its own thread so it overlaps with fetching; the bounded queue keeps memory flat
+        self.sink = sink
+        self.queue = queue.Queue(maxsize=max_batches)
+        self.error = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self) -> None:
+        while True:
+            rows = self.queue.get()
+            if rows is None:
+                break
+            if self.error is not None:
+                continue
+            try:
+                self.sink.write(rows)
+            except Exception as e:
+                self.error = e
+
+    def write(self, rows: list) -> None:
+        if self.error is not None:
+            raise self.error
+        self.queue.put(rows)
+
+    def close(self) -> None:
+        self.queue.put(None)
+        self.thread.join()
+        self.sink.close()
+        if self.error is not None:
+            raise self.error
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import sqlite3
+import time
+
+from record import JobRecord
+
+
+def job_hash(job: dict) -> str:
+    return hashlib.sha1(json.dumps(job, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class Delta:
+    def __init__(self) -> None:
+        self.added = 0
+        self.updated = 0
+        self.removed = 0
+
+    def __len__(self) -> int:
+        return self.added + self.updated + self.removed
+
+    def count(self, change: str) -> None:
+        setattr(self, change, getattr(self, change) + 1)
+
+
+class StateStore:
+    def __init__(self, path: str = 'jobs_state.sqlite') -> None:
+        self.path = path
+        # Written from the engine's consumer thread, one board at a time
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                company TEXT,
+                id TEXT,
+                hash TEXT,
+                record TEXT,
+                first_seen REAL,
+                last_changed REAL,
+                platform TEXT,
+                PRIMARY KEY (company, id)
+            )
+        """)
+        # Stores of earlier versions have no platform column, their rows get it on their next change
+        if 'platform' not in {column[1] for column in self.connection.execute('PRAGMA table_info(jobs)')}:
+            self.connection.execute('ALTER TABLE jobs ADD COLUMN platform TEXT')
+        self.connection.commit()
+
+    def changes(self, company: str, jobs, batch_size: int = 500, commit: bool = True, platform: str = None):
+        # Streams (change, job) pairs for one board's postings; unchanged rows are neither yielded nor written.
+        # With commit=False the board is one transaction that the caller commits. Either way a failure rolls back
+        # what is not committed yet, so the board's deletes are not committed along with the next board
+        try:
+            yield from self.board_changes(company, jobs, batch_size, commit, platform)
+        except BaseException:
+            self.connection.rollback()
+            raise
+
+    def board_changes(self, company: str, jobs, batch_size: int, commit: bool, platform: str = None):
+        now = time.time()
+
+        known = dict(self.connection.execute('SELECT id, hash FROM jobs WHERE company = ?', (company,)).fetchall())
+        seen = set()
+        upserts = []
+
+        for job in jobs:
+            # Works for JobRecord and plain dicts alike, the hash is the same for both
+            job_dict = dict(job)
+            job_id = str(job_dict['id'])
+            if job_id in seen:
+                continue
+            seen.add(job_id)
+
+            digest = job_hash(job_dict)
+            if job_id not in known:
+                change = 'added'
+            elif known[job_id] != digest:
+                change = 'updated'
+            else:
+                continue
+
+            upserts.append((company, job_id, digest, json.dumps(job_dict, default=str), now, now, platform))
+            if len(upserts) >= batch_size:
+                self.upsert(upserts, commit)
+                upserts = []
+
+            yield change, job
+
+        self.upsert(upserts, commit)
+
+        for job_id in known:
+            if job_id in seen:
+                continue
+            record = self.connection.execute('SELECT record FROM jobs WHERE company = ? AND id = ?',
+                                             (company, job_id)).fetchone()[0]
+            self.connection.execute('DELETE FROM jobs WHERE company = ? AND id = ?', (company, job_id))
+            yield 'removed', JobRecord(**json.loads(record))
+
+        if commit:
+            self.connection.commit()
+
+    def upsert(self, rows: list, commit: bool = True) -> None:
+        self.connection.executemany("""
+            INSERT INTO jobs (company, id, hash, record, first_seen, last_changed, platform) VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (company, id) DO UPDATE SET hash = excluded.hash, record = excluded.record,
+                last_changed = excluded.last_changed, platform = excluded.platform
+        """, rows)
+        if commit:
+            self.connection.commit()
+
+    def commit(self) -> None:
+        self.connection.commit()
+
+    def iter_jobs(self):
+        for (record,) in self.connection.execute('SELECT record FROM jobs ORDER BY company, id'):
+            yield JobRecord(**json.loads(record))
+
+    def iter_platform_jobs(self):
+        for platform, record in self.connection.execute('SELECT platform, record FROM jobs ORDER BY company, id'):
+            yield platform, JobRecord(**json.loads(record))
+
+    def close(self) -> None:
+        self.connection.close()
@@ -0,0 +1,68 @@
+import datetime
+import hashlib
+import os
+import sys
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The modules sit at the top of the repository and the recorded payloads with the benchmarks
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from fetcher import DataFetcher
+from extractor import Extractor
+from payloads import PLATFORMS, page_payload
+
+# The Personio extractor builds job links from the feed's subdomain
+FEED_URLS = {
+    'Personio': 'https://acme.jobs.personio.de/xml'
+}
+
+
+class FixtureResponse:
+    def __init__(self, status_code: int, content: bytes = b'', headers: dict = None) -> None:
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.elapsed = datetime.timedelta(0)
+
+
+class FixtureSession:
+    # Answers every request with the recorded payload of one platform, ?page=N as the stand-in server does,
+    # and with a 304 when If-None-Match carries the payload's ETag
+    def __init__(self, platform: str, status_code: int = 200) -> None:
+        self.platform = platform
+        self.status_code = status_code
+        self.requests = []
+
+    def get(self, url: str, headers: dict = None, **kwargs) -> FixtureResponse:
+        self.requests.append((url, dict(headers or {})))
+        if self.status_code != 200:
+            return FixtureResponse(self.status_code, b'error')
+
+        body = page_payload(self.platform, int(parse_qs(urlparse(url).query).get('page', ['1'])[0]))
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if (headers or {}).get('If-None-Match') == etag:
+            return FixtureResponse(304)
+        return FixtureResponse(200, body, {'ETag': etag})
+
+
+def create_fetcher(platform: str, company: str = 'Acme', session=None, cache=None) -> DataFetcher:
+    url = FEED_URLS.get(platform, f'https://{platform.lower()}.example/jobs')
+    session = session if session is not None else FixtureSession(platform)
+    return DataFetcher.create([url], PLATFORMS[platform][0], company, platform, session, cache)
+
+
+def extract_jobs(data_fetcher: DataFetcher) -> list:
+    data_fetcher.get_data()
+    return list(Extractor.create(data_fetcher).iter_jobs())
+
+
+@pytest.fixture
+def fixture_jobs():
+    # fixture_jobs('Greenhouse') gives the postings of the recorded Greenhouse payload
+    def jobs(platform: str, company: str = 'Acme') -> list:
+        return extract_jobs(create_fetcher(platform, company))
+    return jobs
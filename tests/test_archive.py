@@ -0,0 +1,73 @@
+import pytest
+
+from archive import ArchivingSession, PayloadArchive, ReplaySession
+from cache import ResponseCache
+from conftest import FixtureSession, create_fetcher, extract_jobs
+from extractor import Extractor
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = PayloadArchive(str(tmp_path / 'archive'))
+    yield archive
+    archive.close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'responses.sqlite'))
+    yield cache
+    cache.close()
+
+
+def archived_run(archive, cache, run_at: str, platform: str) -> list:
+    # What an archiving run does per board, an unchanged feed is not extracted
+    archive.begin(run_at)
+    session = FixtureSession(platform)
+    data_fetcher = create_fetcher(platform, session=ArchivingSession(session, archive), cache=cache)
+    archive.add_board(data_fetcher.url[0], data_fetcher.company_name, platform, data_fetcher.source_type)
+    data_fetcher.get_data()
+    if not data_fetcher.not_modified:
+        list(Extractor.create(data_fetcher).iter_jobs())
+        data_fetcher.commit_cache()
+    return session.requests
+
+
+def replayed_jobs(archive, run_at: str, platform: str) -> list:
+    [(feed, company, platform, source_type)] = archive.boards(run_at)
+    data_fetcher = create_fetcher(platform, company=company, session=ReplaySession(archive, run_at))
+    assert data_fetcher.url[0] == feed
+    return extract_jobs(data_fetcher)
+
+
+@pytest.mark.parametrize('platform', ['Greenhouse', 'Join', 'Teamtailor'])
+def test_run_is_replayed(archive, cache, platform):
+    archived_run(archive, cache, '2026-01-01T00:00:00', platform)
+    assert replayed_jobs(archive, '2026-01-01T00:00:00', platform) == extract_jobs(create_fetcher(platform))
+
+
+@pytest.mark.parametrize('platform', ['Greenhouse', 'Join', 'Teamtailor'])
+def test_unchanged_board_is_replayed_with_its_pages(archive, cache, platform):
+    archived_run(archive, cache, '2026-01-01T00:00:00', platform)
+    stored = archive.stored
+
+    # The feed answers 304 and the pages are not requested, the run still replays every page
+    assert len(archived_run(archive, cache, '2026-01-02T00:00:00', platform)) == 1
+    assert archive.stored == stored
+    assert replayed_jobs(archive, '2026-01-02T00:00:00', platform) == extract_jobs(create_fetcher(platform))
+
+
+def test_unchanged_payload_is_stored_once(archive):
+    for run_at in ['2026-01-01T00:00:00', '2026-01-02T00:00:00']:
+        archived_run(archive, ResponseCache(':memory:', bypass=True), run_at, 'Greenhouse')
+
+    assert (archive.stored, archive.reused) == (1, 1)
+    assert archive.runs() == ['2026-01-01T00:00:00', '2026-01-02T00:00:00']
+    assert archive.runs(since='2026-01-02') == ['2026-01-02T00:00:00']
+
+
+def test_missing_payload_fails_the_replay(archive, cache):
+    archived_run(archive, cache, '2026-01-01T00:00:00', 'Greenhouse')
+
+    with pytest.raises(ValueError, match='not archived'):
+        ReplaySession(archive, '2026-01-02T00:00:00').get('https://greenhouse.example/jobs')
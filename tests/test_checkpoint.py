@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+from checkpoint import RunJournal
+from state import StateStore
+
+
+@pytest.fixture
+def state(tmp_path):
+    state = StateStore(str(tmp_path / 'state.sqlite'))
+    yield state
+    state.close()
+
+
+def run_board(journal, state, feed: str, jobs: list) -> None:
+    # What a checkpointed run does per board: the state changes and the journal entry in one commit
+    board_file = journal.open_board(feed)
+    rows = [dict(job, change=change) for change, job in state.changes(feed, jobs, commit=False)]
+    board_file.write(rows)
+    journal.record(feed, feed, board_file)
+    state.commit()
+
+
+def test_interrupted_run_is_resumed(tmp_path, state, fixture_jobs):
+    directory = str(tmp_path / 'runs')
+    journal = RunJournal(state.connection, directory, run_id='first')
+    run_board(journal, state, 'greenhouse', fixture_jobs('Greenhouse', company='greenhouse'))
+
+    # A board that fails halfway leaves neither rows nor state behind
+    board_file = journal.open_board('lever')
+    board_file.write([{'id': 1}])
+    board_file.abort()
+
+    resumed = RunJournal(state.connection, directory, resume=True)
+    assert resumed.resumed
+    assert resumed.run_id == 'first'
+    assert resumed.completed() == {'greenhouse'}
+
+    run_board(resumed, state, 'lever', fixture_jobs('Lever', company='lever'))
+    rows = list(resumed.iter_rows())
+    assert [row['company'] for row in rows] == ['greenhouse'] * 30 + ['lever'] * 30
+    assert {row['change'] for row in rows} == {'added'}
+
+
+def test_unfinished_run_is_not_orphaned(tmp_path, state, fixture_jobs):
+    directory = str(tmp_path / 'runs')
+    journal = RunJournal(state.connection, directory, run_id='first')
+    run_board(journal, state, 'ashby', fixture_jobs('Ashby', company='ashby'))
+
+    with pytest.raises(ValueError, match='unfinished'):
+        RunJournal(state.connection, directory, run_id='second')
+
+
+def test_finished_run_starts_over(tmp_path, state, fixture_jobs):
+    directory = str(tmp_path / 'runs')
+    journal = RunJournal(state.connection, directory, run_id='first')
+    run_board(journal, state, 'polymer', fixture_jobs('Polymer', company='polymer'))
+    journal.finish()
+
+    assert not os.path.exists(journal.run_directory)
+
+    # Nothing to resume, --resume then starts a new run
+    journal = RunJournal(state.connection, directory, run_id='second', resume=True)
+    assert not journal.resumed
+    assert journal.run_id == 'second'
+    assert journal.completed() == set()
@@ -0,0 +1,108 @@
+import html
+
+from dedup import DedupIndex
+from record import JobRecord
+
+
+def copy(job: JobRecord, **fields) -> JobRecord:
+    return JobRecord(**dict(job.as_dict(), **fields))
+
+
+def test_reposts_are_grouped(fixture_jobs):
+    jobs = fixture_jobs('Greenhouse')
+    dedup = DedupIndex()
+
+    first = {}
+    for job in jobs:
+        original = dedup.add(job)
+        # Every posting of the board shares one boilerplate text, only the repeated title and location count
+        expected = first.setdefault((job.title, job.location), (job.company, job.id))
+        assert original == (None if expected == (job.company, job.id) else expected)
+    assert dedup.duplicates == len(jobs) - len(first)
+
+
+def test_mirrored_posting_is_grouped(fixture_jobs):
+    job = fixture_jobs('Greenhouse')[0]
+    dedup = DedupIndex()
+    dedup.add(job)
+
+    # Title suffix, entity escaped description and an id of its own
+    mirror = copy(job, id='mirror', title=f'{job.title} (m/w/d)', description=html.unescape(job.description))
+
+    assert dedup.add(mirror) == (job.company, job.id)
+
+
+def test_similar_description_alone_is_not_a_duplicate(fixture_jobs):
+    job = fixture_jobs('Lever')[0]
+    dedup = DedupIndex()
+    dedup.add(job)
+
+    assert dedup.add(copy(job, id='other-title', title='Office Manager')) is None
+    assert dedup.add(copy(job, id='other-location', location='Lisbon')) is None
+
+
+def test_companies_are_not_grouped(fixture_jobs):
+    dedup = DedupIndex()
+    for job in fixture_jobs('Ashby'):
+        dedup.add(job)
+    duplicates = dedup.duplicates
+
+    for job in fixture_jobs('Ashby', company='Other'):
+        dedup.add(job)
+
+    assert dedup.duplicates == 2 * duplicates
+
+
+def run_board(state, dedup, jobs: list) -> list:
+    # The export path of a run: the board's changes against the state store, without the duplicates
+    changes = ((change, dict(job)) for change, job in state.changes('Acme', jobs))
+    return [(change, row['id']) for change, row in dedup.exported(changes)]
+
+
+def seeded(state) -> DedupIndex:
+    dedup = DedupIndex()
+    for job in state.iter_jobs():
+        dedup.add(dict(job))
+    return dedup
+
+
+def test_repost_under_a_new_id_is_exported(tmp_path, fixture_jobs):
+    from state import StateStore
+
+    state = StateStore(str(tmp_path / 'state.sqlite'))
+    jobs = fixture_jobs('Greenhouse')
+    run_board(state, seeded(state), jobs)
+
+    # The board takes a posting without duplicates down and puts it up again under a new id
+    pairs = [(job.title, job.location) for job in jobs]
+    original = next(job for job in jobs if pairs.count((job.title, job.location)) == 1)
+    repost = copy(original, id=5000000000)
+    exported = run_board(state, seeded(state), [repost if job is original else job for job in jobs])
+
+    assert exported == [('removed', original.id), ('added', 5000000000)]
+    state.close()
+
+
+def test_mirror_takes_over_a_removed_posting(tmp_path, fixture_jobs):
+    from state import StateStore
+
+    state = StateStore(str(tmp_path / 'state.sqlite'))
+    job = fixture_jobs('Lever')[0]
+    mirror = copy(job, id='mirror', title=f'{job.title} (m/w/d)')
+    assert run_board(state, seeded(state), [job, mirror]) == [('added', job.id)]
+
+    assert run_board(state, seeded(state), [mirror]) == [('removed', job.id), ('added', 'mirror')]
+    assert run_board(state, seeded(state), [mirror]) == []
+    state.close()
+
+
+def test_removed_duplicate_leaves_its_group():
+    job = JobRecord('Acme', 1, 'Backend Engineer', location='Berlin')
+    dedup = DedupIndex()
+    dedup.add(job)
+    dedup.add(copy(job, id=2))
+    dedup.add(copy(job, id=3))
+
+    assert dedup.remove(copy(job, id=2)) is None
+    assert dedup.remove(job) == ('Acme', 3)
+    assert dedup.add(copy(job, id=4)) == ('Acme', 3)
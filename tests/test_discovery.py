@@ -0,0 +1,104 @@
+import datetime
+
+import pytest
+
+from discovery import Discovery, DiscoveryCache, slug_guesses
+from payloads import page_payload
+
+GREENHOUSE_FEED = 'https://boards-api.greenhouse.io/v1/boards/acme/jobs'
+LEVER_FEED = 'https://api.lever.co/v0/postings/acme?mode=json'
+JOIN_FEED = 'https://join.com/companies/acme'
+
+
+class WebResponse:
+    def __init__(self, url: str, status_code: int, content: bytes = b'') -> None:
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.text = content.decode('utf-8')
+        self.headers = {}
+        self.elapsed = datetime.timedelta(0)
+
+
+class WebSession:
+    # Answers the given pages and 404 for everything else
+    def __init__(self, pages: dict) -> None:
+        self.pages = pages
+        self.requests = []
+
+    def get(self, url: str, headers: dict = None, **kwargs) -> WebResponse:
+        self.requests.append(url)
+        if url not in self.pages:
+            return WebResponse(url, 404, b'Not found')
+        return WebResponse(url, 200, self.pages[url])
+
+
+def careers_page(*links) -> bytes:
+    return ''.join(f'<a href="{link}">Open positions</a>' for link in links).encode('utf-8')
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = DiscoveryCache(str(tmp_path / 'discovery.sqlite'))
+    yield cache
+    cache.close()
+
+
+def test_linked_board_is_found(cache):
+    session = WebSession({
+        'https://www.acme.io/careers': careers_page('https://boards.greenhouse.io/acme'),
+        GREENHOUSE_FEED: page_payload('Greenhouse', 1)
+    })
+
+    result = Discovery(session, cache).discover('www.acme.io/careers')
+
+    assert result == {'platform': 'Greenhouse', 'source': 'json', 'feed': GREENHOUSE_FEED,
+                      'job_board': 'https://job-boards.greenhouse.io/acme', 'postings': 30}
+
+
+def test_cheapest_source_wins(cache):
+    session = WebSession({
+        'https://acme.io/jobs': careers_page('https://join.com/companies/acme', 'https://jobs.lever.co/acme'),
+        JOIN_FEED: page_payload('Join', 1),
+        LEVER_FEED: page_payload('Lever', 1)
+    })
+
+    assert Discovery(session, cache).discover('https://acme.io/jobs')['feed'] == LEVER_FEED
+
+
+def test_slug_is_guessed_from_the_domain(cache):
+    # The page links to no board, Lever answers for the domain's name
+    session = WebSession({'https://careers.acme.io/': b'<h1>Join us</h1>', LEVER_FEED: page_payload('Lever', 1)})
+
+    result = Discovery(session, cache).discover('https://careers.acme.io/')
+
+    assert (result['platform'], result['feed']) == ('Lever', LEVER_FEED)
+    assert slug_guesses('https://careers.acme.io/', 'Acme Robotics') == ['acme', 'acmerobotics', 'acme-robotics']
+
+
+def test_discovery_is_cached(cache):
+    session = WebSession({
+        'https://acme.io/jobs': careers_page('https://boards.greenhouse.io/acme'),
+        GREENHOUSE_FEED: page_payload('Greenhouse', 1)
+    })
+    discovery = Discovery(session, cache)
+    result = discovery.discover('https://acme.io/jobs')
+    requests = len(session.requests)
+
+    assert discovery.discover('https://acme.io/jobs') == result
+    assert len(session.requests) == requests
+    assert cache.hits == 1
+
+
+def test_miss_is_probed_again_after_its_ttl(tmp_path):
+    session = WebSession({})
+    for miss_ttl, probes in [(60, 1), (0, 2)]:
+        session.requests = []
+        cache = DiscoveryCache(str(tmp_path / f'discovery-{miss_ttl}.sqlite'), miss_ttl=miss_ttl)
+        discovery = Discovery(session, cache)
+        assert discovery.discover('https://acme.io/jobs') is None
+        requests = len(session.requests)
+        assert discovery.discover('https://acme.io/jobs') is None
+        cache.close()
+
+        assert len(session.requests) == requests * probes
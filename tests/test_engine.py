@@ -0,0 +1,114 @@
+import threading
+import time
+
+from conftest import FixtureSession, create_fetcher
+from engine import FetchEngine
+from resilience import CircuitBreaker
+
+
+class CountingSession(FixtureSession):
+    # Counts the downloads in flight and the most that ran at once, per host and overall
+    def __init__(self, platform: str, delay: float = 0.0, delays: dict = None) -> None:
+        super().__init__(platform)
+        self.delay = delay
+        # Seconds per host, for the hosts that answer slower than delay
+        self.delays = delays or {}
+        self.lock = threading.Lock()
+        self.started = 0
+        self.active = {}
+        self.peak = {}
+
+    def get(self, url: str, headers: dict = None, **kwargs):
+        host = url.split('/')[2]
+        with self.lock:
+            self.started += 1
+            for key in (host, None):
+                self.active[key] = self.active.get(key, 0) + 1
+                self.peak[key] = max(self.peak.get(key, 0), self.active[key])
+        try:
+            time.sleep(self.delays.get(host, self.delay))
+            return super().get(url, headers, **kwargs)
+        finally:
+            with self.lock:
+                for key in (host, None):
+                    self.active[key] -= 1
+
+
+def create_boards(session, count: int, hosts: int = None) -> list:
+    data_fetchers = []
+    for i in range(count):
+        data_fetcher = create_fetcher('Greenhouse', company=f'company-{i}', session=session)
+        data_fetcher.url = [f'https://host-{i % (hosts or count)}.example/jobs/{i}']
+        data_fetchers.append(data_fetcher)
+    return data_fetchers
+
+
+def test_downloads_wait_for_the_consumer():
+    session = CountingSession('Greenhouse')
+    engine = FetchEngine(max_concurrency=8, max_per_host=8, max_pending=2)
+    waiting = []
+
+    def on_result(data_fetcher, data_extractor, error):
+        assert error is None
+        # Boards downloaded or downloading that the consumer has not finished yet, this one included
+        waiting.append(session.started - len(waiting))
+        time.sleep(0.02)
+
+    engine.run(create_boards(session, 8), on_result)
+
+    assert len(waiting) == 8
+    assert max(waiting) <= 2
+
+
+def test_downloads_keep_to_the_limits():
+    session = CountingSession('Greenhouse', delay=0.05)
+    engine = FetchEngine(max_concurrency=4, max_per_host=2)
+    errors = []
+
+    engine.run(create_boards(session, 12, hosts=3), lambda data_fetcher, data_extractor, error: errors.append(error))
+
+    assert errors == [None] * 12
+    assert session.peak[None] == 4
+    assert all(session.peak[f'host-{i}.example'] <= 2 for i in range(3))
+
+
+def test_boards_are_consumed_as_they_complete():
+    session = CountingSession('Greenhouse', delays={'host-0.example': 0.3, 'host-1.example': 0.1})
+    engine = FetchEngine()
+    consumed = []
+
+    def on_result(data_fetcher, data_extractor, error):
+        consumed.append(data_fetcher.company_name)
+        # The feed is in and the postings stream from it while other boards download
+        assert len(list(data_extractor.iter_jobs())) > 0
+
+    engine.run(create_boards(session, 3), on_result)
+
+    assert consumed == ['company-2', 'company-1', 'company-0']
+
+
+def test_slow_board_times_out():
+    session = CountingSession('Greenhouse', delays={'host-0.example': 1.0})
+    engine = FetchEngine(board_timeout=0.2)
+    errors = {}
+
+    start = time.perf_counter()
+    engine.run(create_boards(session, 3), lambda data_fetcher, data_extractor, error:
+               errors.__setitem__(data_fetcher.company_name, error))
+
+    # The run does not wait for the board's worker thread
+    assert time.perf_counter() - start < 0.9
+    assert str(errors.pop('company-0')) == 'Board timed out'
+    assert errors == {'company-1': None, 'company-2': None}
+
+
+def test_failing_board_is_skipped_by_the_breaker():
+    engine = FetchEngine(circuit_breaker=CircuitBreaker(threshold=1, cooldown=60))
+    session = FixtureSession('Greenhouse', status_code=503)
+
+    for expected in ['HTTP error 503', 'Circuit open']:
+        errors = []
+        engine.run([create_fetcher('Greenhouse', session=session)],
+                   lambda data_fetcher, data_extractor, error: errors.append(str(error)))
+        assert errors == [expected]
+    assert len(session.requests) == 1
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from conftest import FixtureResponse
+from enrich import DescriptionCache, DescriptionEnricher
+
+
+class DetailSession:
+    # Serves a JobPosting detail page for every posting except the ones listed as unreadable
+    def __init__(self, unreadable: set = ()) -> None:
+        self.unreadable = set(unreadable)
+        self.requests = []
+
+    def get(self, url: str, headers: dict = None, **kwargs) -> FixtureResponse:
+        self.requests.append(url)
+        if url in self.unreadable:
+            return FixtureResponse(200, b'<html><body>No structured data</body></html>')
+        posting = json.dumps({'@type': 'JobPosting', 'description': f'Description of {url}'})
+        return FixtureResponse(200, f'<script type="application/ld+json">{posting}</script>'.encode('utf-8'))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = DescriptionCache(str(tmp_path / 'descriptions.sqlite'))
+    yield cache
+    cache.close()
+
+
+def test_descriptions_are_fetched_once(cache, fixture_jobs):
+    session = DetailSession()
+    DescriptionEnricher(session, cache).enrich('Teamtailor', fixture_jobs('Teamtailor'))
+    assert len(session.requests) == 80
+
+    jobs = fixture_jobs('Teamtailor')
+    DescriptionEnricher(session, cache).enrich('Teamtailor', jobs)
+    assert len(session.requests) == 80
+    assert all(job.description == f'Description of {job.url}' for job in jobs)
+
+
+def test_missing_description_is_cached(cache, fixture_jobs):
+    unreadable = fixture_jobs('Teamtailor')[0].url
+    session = DetailSession({unreadable})
+    enricher = DescriptionEnricher(session, cache)
+    enricher.enrich('Teamtailor', fixture_jobs('Teamtailor'))
+    assert enricher.failed == 1
+
+    # The miss is answered from the cache on the next run instead of fetching the page again
+    jobs = fixture_jobs('Teamtailor')
+    enricher.enrich('Teamtailor', jobs)
+    assert session.requests.count(unreadable) == 1
+    assert jobs[0].description is None
+
+    # A changed listing is fetched again
+    jobs = fixture_jobs('Teamtailor')
+    jobs[0].title = 'Staff Backend Engineer'
+    enricher.enrich('Teamtailor', jobs)
+    assert session.requests.count(unreadable) == 2
+
+
+def test_missing_description_expires(tmp_path, fixture_jobs):
+    cache = DescriptionCache(str(tmp_path / 'descriptions.sqlite'), miss_ttl=0)
+    unreadable = fixture_jobs('Teamtailor')[0].url
+    session = DetailSession({unreadable})
+    enricher = DescriptionEnricher(session, cache)
+    enricher.enrich('Teamtailor', fixture_jobs('Teamtailor'))
+    enricher.enrich('Teamtailor', fixture_jobs('Teamtailor'))
+    cache.close()
+
+    assert session.requests.count(unreadable) == 2
+    assert len(session.requests) == 81
@@ -0,0 +1,68 @@
+import sqlite3
+
+import pytest
+
+from cache import ResponseCache
+from conftest import FixtureSession, create_fetcher, extract_jobs
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'responses.sqlite'))
+    yield cache
+    cache.close()
+
+
+@pytest.mark.parametrize('platform', ['Greenhouse', 'Personio'])
+def test_unchanged_feed_is_answered_from_the_cache(cache, platform):
+    session = FixtureSession(platform)
+    data_fetcher = create_fetcher(platform, session=session, cache=cache)
+    extract_jobs(data_fetcher)
+    data_fetcher.commit_cache()
+
+    # The board is skipped, so the unchanged feed is not parsed again
+    data_fetcher = create_fetcher(platform, session=session, cache=cache)
+    data_fetcher.get_data()
+    assert data_fetcher.not_modified
+    assert data_fetcher.data is None
+    assert 'parse' not in data_fetcher.timings
+    assert 'If-None-Match' in session.requests[-1][1]
+    assert cache.hits == 1
+
+
+def test_validators_wait_for_the_commit(cache):
+    # A board whose extraction or state commit failed is fetched in full again
+    session = FixtureSession('Ashby')
+    extract_jobs(create_fetcher('Ashby', session=session, cache=cache))
+
+    data_fetcher = create_fetcher('Ashby', session=session, cache=cache)
+    extract_jobs(data_fetcher)
+    assert not data_fetcher.not_modified
+    assert 'If-None-Match' not in session.requests[-1][1]
+
+
+def test_error_page_is_not_parsed(cache):
+    data_fetcher = create_fetcher('Lever', session=FixtureSession('Lever', status_code=503), cache=cache)
+
+    with pytest.raises(ValueError, match='HTTP error 503'):
+        data_fetcher.get_data()
+    data_fetcher.commit_cache()
+    assert cache.get(data_fetcher.url[0]) is None
+
+
+def test_cache_of_an_earlier_version_is_read(tmp_path):
+    # Earlier caches also kept the pickled feed in a data column
+    path = str(tmp_path / 'responses.sqlite')
+    connection = sqlite3.connect(path)
+    connection.execute('CREATE TABLE responses (url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, body BLOB, '
+                       'data BLOB, size INTEGER, accessed_at REAL)')
+    connection.execute("INSERT INTO responses VALUES ('https://greenhouse.example/jobs', '\"x\"', NULL, ?, ?, 7, 0)",
+                       (b'body', b'pickled'))
+    connection.commit()
+    connection.close()
+
+    cache = ResponseCache(path)
+    assert cache.get('https://greenhouse.example/jobs').conditional_headers() == {'If-None-Match': '"x"'}
+    cache.put('https://greenhouse.example/jobs', '"y"', None, b'new body')
+    assert cache.get('https://greenhouse.example/jobs').body == b'new body'
+    cache.close()
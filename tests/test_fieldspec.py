@@ -0,0 +1,119 @@
+import pytest
+
+from fieldspec import Field, FieldSpec
+from normalize import Normalizer
+from record import JobRecord
+
+
+# The per-platform loops the field specs replaced, kept here as the reference for what every spec has to produce
+def record(normalizer, company, id, title, url, departments, location, employment_type, description, published_on,
+           normalize_employment_type=True):
+    return JobRecord(company, id, title, url, normalizer.department(departments), normalizer.location(location),
+                     normalizer.employment_type(employment_type) if normalize_employment_type else employment_type,
+                     description, published_on)
+
+
+def personio(data, company, normalizer):
+    for position in data:
+        fields = {child.tag: child for child in position}
+        department = fields.get('department')
+        description = ''.join(f"{job_desc.findtext('name')}\n{job_desc.findtext('value').strip()}\n\n"
+                              for job_desc in fields['jobDescriptions'].iter('jobDescription'))
+        yield record(normalizer, company, fields['id'].text, fields['name'].text,
+                     f"https://acme.jobs.personio.de/job/{fields['id'].text}/",
+                     department.text if department is not None else None, fields['office'].text,
+                     fields['employmentType'].text, description, fields['createdAt'].text)
+
+
+def ashby(data, company, normalizer):
+    for position in data['jobs']:
+        yield record(normalizer, company, position['id'], position['title'], position['jobUrl'], position['department'],
+                     position['location'], position['employmentType'], position['descriptionPlain'],
+                     position['publishedAt'])
+
+
+def greenhouse(data, company, normalizer):
+    for position in data['jobs']:
+        employment_type = position['metadata'][0]['value'] if position['metadata'] is not None else None
+        yield record(normalizer, company, position['id'], position['title'], position['absolute_url'],
+                     position.get('departments'), position['location']['name'], employment_type,
+                     position.get('content'), position['updated_at'])
+
+
+def lever(data, company, normalizer):
+    for position in data:
+        yield record(normalizer, company, position['id'], position['text'], position['hostedUrl'], None,
+                     position['categories']['location'], position['categories'].get('commitment'),
+                     position['descriptionPlain'], position['createdAt'])
+
+
+def smartrecruiters(data, company, normalizer):
+    for position in data['content']:
+        yield record(normalizer, company, position['id'], position['name'], position['ref'],
+                     position['department'].get('label'), position['location']['city'],
+                     position['experienceLevel']['label'], None, position['releasedDate'])
+
+
+def polymer(data, company, normalizer):
+    for job in data['items']:
+        yield record(normalizer, company, job['id'], job['title'], job['job_post_url'], None, job['display_location'],
+                     job['kind_pretty'], None, job['published_at'], normalize_employment_type=False)
+
+
+def recruitee(data, company, normalizer):
+    for position in data['offers']:
+        yield record(normalizer, company, position['id'], position['sharing_title'], position['careers_url'],
+                     position['department'], position['location'], position['employment_type_code'],
+                     position['description'], position['published_at'])
+
+
+def dover(data, company, normalizer):
+    for job in data['results']:
+        yield JobRecord(company, job['id'], job['title'], f"https://app.dover.com/apply/{company}/{job['id']}",
+                        None, normalizer.location(job['locations'][0]['location_option']['city']), None, None, None)
+
+
+REFERENCES = {
+    'Personio': personio,
+    'Ashby': ashby,
+    'Greenhouse': greenhouse,
+    'Lever': lever,
+    'SmartRecruiters': smartrecruiters,
+    'Polymer': polymer,
+    'Recruitee': recruitee,
+    'Dover': dover
+}
+
+
+@pytest.mark.parametrize('platform', list(REFERENCES))
+def test_spec_matches_the_old_extractor(platform, fixture_jobs):
+    from conftest import create_fetcher
+
+    data_fetcher = create_fetcher(platform)
+    data_fetcher.get_data()
+    expected = list(REFERENCES[platform](data_fetcher.data, 'Acme', Normalizer.shared()))
+
+    jobs = fixture_jobs(platform)
+    assert len(jobs) == 30
+    assert jobs == expected
+
+
+def test_optional_paths_fall_back_to_the_default():
+    spec = FieldSpec('jobs', {
+        'id': 'id',
+        'title': Field('title', transform=str.strip),
+        'url': Field('id', template='https://{company}.example/{value}'),
+        'location': Field('offices.0.name', optional=True, default='Remote', normalize=False)
+    })
+    extract = spec.compile('acme', 'https://acme.example/jobs', Normalizer.shared())
+
+    jobs = list(extract({'jobs': [{'id': 1, 'title': ' Engineer ', 'offices': []},
+                                  {'id': 2, 'title': 'Designer', 'offices': [{'name': 'Berlin'}]}]}))
+
+    assert jobs == [JobRecord('acme', 1, 'Engineer', 'https://acme.example/1', None, 'Remote'),
+                    JobRecord('acme', 2, 'Designer', 'https://acme.example/2', None, 'Berlin')]
+
+
+def test_unknown_fields_are_rejected():
+    with pytest.raises(ValueError, match='Unknown fields salary'):
+        FieldSpec('jobs', {'id': 'id', 'salary': 'compensation'})
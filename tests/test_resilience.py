@@ -0,0 +1,127 @@
+import email.utils
+import io
+import time
+
+import pytest
+import requests
+
+import session as session_module
+from resilience import CircuitBreaker, RetryPolicy, TokenBucket, retry_after
+from session import HttpSession
+
+
+def scripted_response(status_code: int, retry_after_header: str = None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = b'body'
+    response.raw = io.BytesIO(b'body')
+    if retry_after_header is not None:
+        response.headers['Retry-After'] = retry_after_header
+    return response
+
+
+class ScriptedSession:
+    # Stands in for the requests.Session under HttpSession, answers with the given statuses in order
+    def __init__(self, *answers) -> None:
+        self.answers = list(answers)
+        self.requests = 0
+
+    def get(self, url: str, headers: dict = None, **kwargs) -> requests.Response:
+        self.requests += 1
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(session_module.time, 'sleep', sleeps.append)
+    return sleeps
+
+
+def scripted_session(*answers, **kwargs) -> HttpSession:
+    http = HttpSession(retry_policy=RetryPolicy(**kwargs))
+    http.session = ScriptedSession(*answers)
+    return http
+
+
+def test_retry_after_is_read_as_seconds_or_date():
+    assert retry_after(scripted_response(429, '120')) == 120
+    date = email.utils.formatdate(time.time() + 60, usegmt=True)
+    assert 55 <= retry_after(scripted_response(429, date)) <= 60
+    assert retry_after(scripted_response(429, 'soon')) is None
+    assert retry_after(scripted_response(429)) is None
+
+
+def test_failed_requests_are_retried(sleeps):
+    http = scripted_session(scripted_response(503), requests.ConnectionError(), scripted_response(200))
+
+    assert http.get('https://acme.example/jobs').status_code == 200
+    assert http.stats.retries == 2
+    assert len(sleeps) == 2
+
+
+def test_retries_are_spent(sleeps):
+    http = scripted_session(*[scripted_response(502)] * 3, retries=2)
+
+    assert http.get('https://acme.example/jobs').status_code == 502
+    assert http.session.requests == 3
+
+
+def test_client_error_is_not_retried(sleeps):
+    http = scripted_session(scripted_response(404))
+
+    assert http.get('https://acme.example/jobs').status_code == 404
+    assert sleeps == []
+
+
+def test_short_retry_after_is_waited_for(sleeps):
+    http = scripted_session(scripted_response(429, '5'), scripted_response(200), max_backoff=30)
+
+    assert http.get('https://acme.example/jobs').status_code == 200
+    assert sleeps == [5]
+
+
+def test_long_retry_after_is_not_retried(sleeps):
+    # The board gets the 429 at once instead of a retry after max_backoff that the server would refuse again
+    http = scripted_session(scripted_response(429, '3600'), scripted_response(200), max_backoff=30)
+
+    assert http.get('https://acme.example/jobs').status_code == 429
+    assert http.session.requests == 1
+    assert sleeps == []
+
+
+def test_backoff_stays_within_the_limit():
+    policy = RetryPolicy(backoff=1, max_backoff=4)
+    assert all(0 <= policy.delay(attempt) <= 4 for attempt in range(10))
+
+
+def test_circuit_opens_and_half_opens(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    breaker = CircuitBreaker(threshold=2, cooldown=60)
+
+    breaker.failure('feed')
+    assert breaker.allow('feed')
+    breaker.failure('feed')
+    assert not breaker.allow('feed')
+    assert breaker.open_circuits() == ['feed']
+
+    # One attempt goes through after the cooldown, its success closes the circuit
+    now[0] += 60
+    assert breaker.allow('feed')
+    assert not breaker.allow('feed')
+    breaker.success('feed')
+    assert breaker.allow('feed')
+    assert breaker.open_circuits() == []
+
+
+def test_token_bucket_spaces_requests(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(time, 'sleep', lambda seconds: now.__setitem__(0, now[0] + seconds))
+    bucket = TokenBucket(rate=2, burst=2)
+
+    assert [bucket.acquire() for _ in range(4)] == [0, 0, 0.5, 0.5]
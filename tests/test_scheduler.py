@@ -0,0 +1,79 @@
+import pytest
+
+from scheduler import Scheduler
+
+FEEDS = ['https://boards.greenhouse.io/acme', 'https://boards.greenhouse.io/finn', 'https://api.lever.co/acme']
+
+
+@pytest.fixture
+def scheduler(tmp_path):
+    scheduler = Scheduler(str(tmp_path / 'state.sqlite'), min_interval=60, max_interval=3600, initial_interval=600,
+                          jitter=0, host_delay=2)
+    yield scheduler
+    scheduler.close()
+
+
+def test_new_boards_are_due_and_hosts_are_spaced(scheduler):
+    for feed in FEEDS:
+        scheduler.add(feed)
+    now = max(due for due, _, _ in scheduler.queue)
+
+    # One board per host at a time, the second Greenhouse board waits for host_delay
+    assert scheduler.pop_due(now) == [FEEDS[0], FEEDS[2]]
+    assert scheduler.pop_due(now + 1) == []
+    assert scheduler.wait_time(now + 1) == 1
+    assert scheduler.pop_due(now + 2) == [FEEDS[1]]
+
+
+def test_intervals_follow_the_changes(scheduler):
+    scheduler.add(FEEDS[0])
+    scheduler.pop_due(scheduler.queue[0][0])
+
+    intervals = []
+    for changed in [True, True, True, True, False, False]:
+        scheduler.record(FEEDS[0], changed, now=0)
+        intervals.append(scheduler.intervals[FEEDS[0]])
+
+    # Halved while the board changes down to min_interval, then backs off by half again
+    assert intervals == [300, 150, 75, 60, 90, 135]
+
+
+def test_backoff_stops_at_max_interval(scheduler):
+    scheduler.add(FEEDS[2])
+    for _ in range(20):
+        scheduler.record(FEEDS[2], False, now=0)
+
+    assert scheduler.intervals[FEEDS[2]] == 3600
+
+
+def test_schedule_outlives_the_process(tmp_path, scheduler):
+    scheduler.add(FEEDS[0])
+    scheduler.record(FEEDS[0], True, now=1000)
+
+    restarted = Scheduler(str(tmp_path / 'state.sqlite'), initial_interval=600, jitter=0)
+    restarted.add(FEEDS[0])
+    assert restarted.intervals[FEEDS[0]] == 300
+    assert restarted.pop_due(1299) == []
+    assert restarted.pop_due(1300) == [FEEDS[0]]
+    restarted.close()
+
+
+def test_run_records_what_changed(tmp_path, monkeypatch):
+    scheduler = Scheduler(str(tmp_path / 'state.sqlite'), min_interval=60, initial_interval=600, jitter=0, host_delay=0)
+    for feed in FEEDS:
+        scheduler.add(feed)
+    runs = []
+
+    def sleep(seconds):
+        # Nothing is due before the next interval, the test stops where the loop would wait
+        assert seconds > 0
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr('scheduler.time.sleep', sleep)
+    with pytest.raises(KeyboardInterrupt):
+        scheduler.run(lambda feeds: runs.append(feeds) or {FEEDS[0]: True})
+    scheduler.close()
+
+    # Boards missing from the answer count as unchanged
+    assert runs == [FEEDS]
+    assert scheduler.intervals == {FEEDS[0]: 300, FEEDS[1]: 900, FEEDS[2]: 900}
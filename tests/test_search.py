@@ -0,0 +1,94 @@
+import pytest
+
+from search import SearchIndex
+from state import StateStore
+
+PLATFORMS = ['Greenhouse', 'Lever', 'Ashby']
+
+
+def delta_rows(fixture_jobs, platform: str, change: str = 'added') -> list:
+    return [dict(job, company=platform, platform=platform.lower(), change=change)
+            for job in fixture_jobs(platform, company=platform)]
+
+
+@pytest.fixture
+def rows(fixture_jobs):
+    return [row for platform in PLATFORMS for row in delta_rows(fixture_jobs, platform)]
+
+
+@pytest.fixture
+def index(tmp_path, rows):
+    index = SearchIndex(str(tmp_path / 'jobs_search.sqlite'))
+    index.update(rows)
+    yield index
+    index.close()
+
+
+def words_in_title(rows, *words) -> set:
+    return {(row['company'], str(row['id'])) for row in rows
+            if all(word.casefold() in row['title'].casefold().split() for word in words)}
+
+
+def keys(results) -> set:
+    return {(row['company'], row['id']) for row in results}
+
+
+def test_text_matches_every_word(index, rows):
+    expected = words_in_title(rows, 'backend', 'engineer')
+    results = index.search('Backend engineer', limit=100)
+
+    assert expected <= keys(results)
+    assert index.count('backend engineer') == len(results)
+    # Title matches weigh more than the description
+    assert keys(results[:len(expected)]) == expected
+
+
+def test_query_syntax_is_escaped(index):
+    assert index.search('"engineer OR') == []
+    assert index.count('NEAR(backend') == 0
+
+
+def test_facets_combine(index, rows):
+    expected = {(row['company'], str(row['id'])) for row in rows
+                if row['location'] == 'Berlin' and row['platform'] in ('lever', 'ashby')}
+
+    assert keys(index.search(location='berlin', platform=['Lever', 'Ashby'], limit=100)) == expected
+    assert index.count(location='Berlin', platform=['lever', 'ashby']) == len(expected)
+
+
+def test_departments_are_faceted_by_name(index, rows):
+    # Greenhouse lists its departments as objects, Ashby as a string
+    counts = dict(index.facet_counts('platform', departments='Engineering'))
+
+    assert counts['greenhouse'] > 0 and counts['ashby'] > 0
+    assert 'lever' not in counts
+
+
+def test_facet_counts_follow_the_filters(index, rows):
+    counts = dict(index.facet_counts('location', platform='lever', limit=100))
+
+    assert sum(counts.values()) == sum(1 for row in rows if row['platform'] == 'lever' and row['location'])
+    assert counts['berlin'] == sum(1 for row in rows if row['platform'] == 'lever' and row['location'] == 'Berlin')
+
+
+def test_delta_updates_the_index(index, rows):
+    removed, changed = rows[0], dict(rows[1], title='Quantum Gardener', change='updated')
+    index.update([dict(removed, change='removed'), changed])
+
+    assert index.count() == len(rows) - 1
+    assert keys(index.search('quantum gardener')) == {(changed['company'], str(changed['id']))}
+    assert index.count(company=removed['company']) == sum(1 for row in rows if row['company'] == removed['company']) - 1
+
+
+def test_unknown_facet_is_refused(index):
+    with pytest.raises(ValueError, match='Invalid facet'):
+        index.search(salary='high')
+
+
+def test_rebuild_from_the_state(tmp_path, index, fixture_jobs):
+    state = StateStore(str(tmp_path / 'state.sqlite'))
+    list(state.changes('Lever', fixture_jobs('Lever', company='Lever'), platform='lever'))
+    index.rebuild(dict(job, platform=platform) for platform, job in state.iter_platform_jobs())
+    state.close()
+
+    assert index.count() == index.count(platform='lever') == len(fixture_jobs('Lever'))
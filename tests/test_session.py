@@ -0,0 +1,74 @@
+import gzip
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from conftest import create_fetcher, extract_jobs
+from payloads import page_payload
+from session import HttpSession
+
+
+class PayloadHandler(BaseHTTPRequestHandler):
+    # Serves the recorded payload of the platform named by the path, gzipped, over keep-alive connections
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        body = page_payload(url.path.strip('/'), int(parse_qs(url.query).get('page', ['1'])[0]))
+        self.send_response(200)
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PayloadHandler)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def http():
+    http = HttpSession()
+    yield http
+    http.close()
+
+
+def test_connection_is_kept_alive(server, http):
+    for _ in range(5):
+        assert http.get(f'{server}/Greenhouse').status_code == 200
+
+    assert http.stats.requests == 5
+    assert http.stats.connections == 1
+    assert http.stats.connections_reused == 4
+
+
+def test_compressed_bytes_are_counted(server, http):
+    response = http.get(f'{server}/Lever')
+
+    assert response.content == page_payload('Lever', 1)
+    assert http.stats.bytes_received == response.bytes_received < http.stats.bytes_decoded
+
+
+@pytest.mark.parametrize('platform', ['Join', 'Teamtailor'])
+def test_pages_share_the_fetchers_session(server, http, platform):
+    data_fetcher = create_fetcher(platform, session=http)
+    data_fetcher.url = [f'{server}/{platform}']
+    jobs = extract_jobs(data_fetcher)
+
+    assert jobs == extract_jobs(create_fetcher(platform))
+    # The feed and its pages went over the keep-alive pool of one session
+    assert http.stats.requests > 1
+    assert http.stats.connections_reused > 0
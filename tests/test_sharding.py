@@ -0,0 +1,91 @@
+import pytest
+
+from sharding import WorkQueue, parse_shard, shard_boards
+
+FEEDS = [f'https://boards.example/{index}' for index in range(40)]
+
+
+@pytest.fixture
+def queue_path(tmp_path):
+    return str(tmp_path / 'queue.sqlite')
+
+
+def drain(work_queue, worker: str, shard: int, limit: int = 8) -> list:
+    claimed = []
+    while feeds := work_queue.claim(worker, shard, limit):
+        work_queue.finish(feeds)
+        claimed.extend(feeds)
+    return claimed
+
+
+def test_shards_split_the_boards():
+    boards = {feed: None for feed in FEEDS}
+    shards = [shard_boards(boards, index, 4) for index in range(4)]
+
+    assert sum(len(shard) for shard in shards) == len(FEEDS)
+    assert set().union(*shards) == set(FEEDS)
+    assert parse_shard('2/4') == (2, 4)
+    with pytest.raises(ValueError):
+        parse_shard('4/4')
+
+
+def test_workers_claim_every_board_once(queue_path):
+    first, second = WorkQueue(queue_path), WorkQueue(queue_path)
+    first.fill(FEEDS, 2)
+    second.fill(FEEDS, 2)
+
+    own = first.claim('first', 0, 100)
+    stolen = second.claim('second', 1, 100)
+
+    # The first worker takes every pending board, its own shard first
+    own_shard = sorted(shard_boards(dict.fromkeys(FEEDS), 0, 2))
+    assert sorted(own) == sorted(FEEDS)
+    assert own[:len(own_shard)] == own_shard
+    assert stolen == []
+    first.finish(own, failed={own[0]})
+    assert first.counts() == {'done': len(FEEDS) - 1, 'failed': 1}
+
+
+def test_finished_epoch_is_fetched_again(queue_path):
+    work_queue = WorkQueue(queue_path)
+    epoch = work_queue.fill(FEEDS, 2)
+    drain(work_queue, 'first', 0)
+
+    # Boards that were done in the last run are pending again in the next one
+    next_queue = WorkQueue(queue_path)
+    assert next_queue.fill(FEEDS, 2) == epoch + 1
+    assert next_queue.counts() == {'pending': len(FEEDS)}
+    assert sorted(drain(next_queue, 'second', 1)) == sorted(FEEDS)
+
+
+def test_workers_join_an_open_epoch(queue_path):
+    first = WorkQueue(queue_path)
+    epoch = first.fill(FEEDS, 2)
+    first.finish(first.claim('first', 0, 10))
+
+    second = WorkQueue(queue_path)
+    assert second.fill(FEEDS, 2) == epoch
+    assert len(drain(second, 'second', 1)) == len(FEEDS) - 10
+
+
+def test_new_epoch_leaves_running_workers_alone(queue_path):
+    old = WorkQueue(queue_path)
+    old.fill(FEEDS, 2)
+    claimed = old.claim('old', 0, 10)
+
+    new = WorkQueue(queue_path)
+    new.fill(FEEDS, 2, new_epoch=True)
+
+    old.finish(claimed)
+    assert len(claimed) + len(drain(old, 'old', 0)) == len(FEEDS)
+    assert len(drain(new, 'new', 1)) == len(FEEDS)
+
+
+def test_expired_claims_are_handed_out_again(queue_path):
+    crashed = WorkQueue(queue_path, lease=0)
+    crashed.fill(FEEDS, 1)
+    claimed = crashed.claim('crashed', 0, 10)
+
+    other = WorkQueue(queue_path, lease=0)
+    other.fill(FEEDS, 1)
+    assert set(claimed) <= set(drain(other, 'other', 0))
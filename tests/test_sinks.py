@@ -0,0 +1,107 @@
+import csv
+import gzip
+import json
+import os
+
+import pytest
+
+from sinks import Sink, ThreadedSink
+
+
+def delta_rows(fixture_jobs, platform: str, change: str = 'added') -> list:
+    return [dict(job, platform=platform.lower(), change=change) for job in fixture_jobs(platform)]
+
+
+def test_jsonl_is_appended(tmp_path, fixture_jobs):
+    path = str(tmp_path / 'jobs_delta.jsonl')
+    rows = delta_rows(fixture_jobs, 'Greenhouse')
+    for _ in range(2):
+        sink = Sink.create(path, 'jsonl')
+        sink.write(rows[:10])
+        sink.write(rows[10:])
+        sink.close()
+
+    with open(path, encoding='utf-8') as file:
+        written = [json.loads(line) for line in file]
+    assert written == json.loads(json.dumps(rows + rows, default=str))
+
+
+def test_gzip_members_read_as_one_file(tmp_path, fixture_jobs):
+    path = str(tmp_path / 'jobs_delta.jsonl')
+    rows = delta_rows(fixture_jobs, 'Lever')
+    sink = Sink.create(path, 'jsonl', compression='gzip')
+    sink.write(rows[:5])
+    sink.write(rows[5:])
+    sink.close()
+
+    with gzip.open(path + '.gz', 'rt', encoding='utf-8') as file:
+        assert len(file.readlines()) == len(rows)
+
+
+def test_csv_header_is_written_once(tmp_path, fixture_jobs):
+    path = str(tmp_path / 'jobs_delta.csv')
+    rows = delta_rows(fixture_jobs, 'Ashby')
+    sink = Sink.create(path, 'csv')
+    sink.write(rows[:3])
+    sink.write(rows[3:])
+    sink.close()
+
+    with open(path, encoding='utf-8', newline='') as file:
+        written = list(csv.DictReader(file))
+    assert len(written) == len(rows)
+    assert [row['id'] for row in written] == [str(row['id']) for row in rows]
+
+
+def test_lists_are_flattened_to_json(tmp_path):
+    path = str(tmp_path / 'jobs_delta.csv')
+    sink = Sink.create(path, 'csv')
+    sink.write([{'id': 1, 'departments': ['Engineering', 'Data']}])
+    sink.close()
+
+    with open(path, encoding='utf-8', newline='') as file:
+        assert json.loads(next(csv.DictReader(file))['departments']) == ['Engineering', 'Data']
+
+
+def test_rows_are_partitioned(tmp_path, fixture_jobs):
+    path = str(tmp_path / 'jobs_delta')
+    sink = Sink.create(path, 'jsonl', partition_by=['platform', 'change'])
+    sink.write(delta_rows(fixture_jobs, 'Greenhouse') + delta_rows(fixture_jobs, 'Dover', change='removed'))
+    sink.close()
+
+    assert sorted(os.listdir(path)) == ['platform=dover', 'platform=greenhouse']
+    with open(os.path.join(path, 'platform=dover', 'change=removed', 'part.jsonl'), encoding='utf-8') as file:
+        assert len(file.readlines()) == len(fixture_jobs('Dover'))
+
+
+def test_parquet_parts_share_one_schema(tmp_path, fixture_jobs):
+    pyarrow_parquet = pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / 'jobs_delta.parquet')
+    rows = delta_rows(fixture_jobs, 'Recruitee')
+    sink = Sink.create(path, 'parquet', row_group_size=10)
+    for start in range(0, len(rows), 4):
+        sink.write(rows[start:start + 4])
+    sink.close()
+
+    # A row group is written once 10 rows are buffered, the 30 rows make two and the rest is flushed on close
+    assert len(os.listdir(path)) == 3
+    table = pyarrow_parquet.read_table(path)
+    assert table.num_rows == len(rows)
+    assert sorted(table.column('id').to_pylist()) == sorted(str(row['id']) for row in rows)
+
+
+def test_unknown_sink_is_refused(tmp_path):
+    with pytest.raises(ValueError, match='Invalid sink type'):
+        Sink.create(str(tmp_path / 'jobs_delta'), 'xml')
+
+
+class FailingSink(Sink):
+    def write_partition(self, path, rows):
+        raise OSError('No space left on device')
+
+
+def test_threaded_sink_raises_the_writers_error(tmp_path):
+    sink = ThreadedSink(FailingSink(str(tmp_path / 'jobs_delta')))
+    sink.write([{'id': 1}])
+
+    with pytest.raises(OSError, match='No space left'):
+        sink.close()
@@ -0,0 +1,99 @@
+import pytest
+
+from record import JobRecord
+from state import StateStore
+
+
+@pytest.fixture
+def state(tmp_path):
+    state = StateStore(str(tmp_path / 'state.sqlite'))
+    yield state
+    state.close()
+
+
+def diff(state, jobs, **kwargs) -> list:
+    return list(state.changes('Acme', jobs, **kwargs))
+
+
+def test_first_run_adds_every_posting(state, fixture_jobs):
+    jobs = fixture_jobs('Greenhouse')
+
+    changes = diff(state, jobs)
+
+    assert [change for change, _ in changes] == ['added'] * len(jobs)
+    assert list(state.iter_jobs()) == sorted(jobs, key=lambda job: str(job.id))
+
+
+def test_unchanged_postings_are_not_yielded(state, fixture_jobs):
+    jobs = fixture_jobs('Ashby')
+    diff(state, jobs)
+
+    assert diff(state, fixture_jobs('Ashby')) == []
+
+
+def test_changed_posting_is_updated(state, fixture_jobs):
+    jobs = fixture_jobs('Lever')
+    diff(state, jobs)
+
+    changed = JobRecord(*jobs[0].values())
+    changed.title = 'Staff ' + changed.title
+    changes = diff(state, [changed] + jobs[1:])
+
+    assert changes == [('updated', changed)]
+
+
+def test_missing_posting_is_removed(state, fixture_jobs):
+    jobs = fixture_jobs('Recruitee')
+    diff(state, jobs)
+
+    changes = diff(state, jobs[1:])
+
+    assert changes == [('removed', jobs[0])]
+    assert jobs[0] not in list(state.iter_jobs())
+    assert diff(state, jobs[1:]) == []
+
+
+def test_removal_is_per_company(state, fixture_jobs):
+    diff(state, fixture_jobs('Polymer'))
+    other = fixture_jobs('Dover', company='Other')
+    list(state.changes('Other', other))
+
+    # Each board only removes its own postings
+    assert diff(state, fixture_jobs('Polymer')) == []
+    assert list(state.changes('Other', other)) == []
+
+
+def test_failed_board_is_rolled_back(state, fixture_jobs):
+    jobs = fixture_jobs('SmartRecruiters')
+    diff(state, jobs)
+
+    def failing():
+        yield from jobs[1:5]
+        raise ValueError('Board timed out')
+
+    with pytest.raises(ValueError):
+        diff(state, failing(), batch_size=2, commit=False)
+
+    # Nothing of the failed board is gone, the next run sees no change
+    assert diff(state, jobs) == []
+
+
+def test_abandoned_deletes_are_not_committed(state, fixture_jobs):
+    jobs = fixture_jobs('SmartRecruiters')
+    diff(state, jobs)
+
+    # The caller fails while the board's removals are streamed, the store commits per batch
+    changes = state.changes('Acme', jobs[2:], batch_size=2)
+    assert next(changes)[0] == 'removed'
+    changes.close()
+
+    # The next board's commit does not take the deletes along
+    list(state.changes('Other', fixture_jobs('Dover', company='Other')))
+    assert [change for change, _ in diff(state, jobs[2:])] == ['removed'] * 2
+
+
+def test_platform_is_kept(state, fixture_jobs):
+    jobs = fixture_jobs('Greenhouse')
+    diff(state, jobs, platform='Greenhouse')
+
+    assert {platform for platform, _ in state.iter_platform_jobs()} == {'Greenhouse'}